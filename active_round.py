@@ -0,0 +1,267 @@
+"""
+Process-wide snapshot of the round voters are currently shown.
+
+The snapshot is rebuilt only when an admin changes state (create, start, next,
+end, image edits) and is swapped in as a whole, so the current-vote endpoints
+read it without locking or touching the database. Each snapshot also carries
+a presence index of who has already voted on the current image or group,
+seeded from the database when the round becomes active and filled in as
+votes arrive, and the images of the next few rounds for clients to preload.
+"""
+import json
+import os
+import threading
+from sqlalchemy.orm import joinedload
+from database import db, Image, Poll, PollGroup, Submission, SmashPassSession, SmashPassVote
+
+
+class UserInterner:
+    """Maps session user ids to small consecutive integers for use as bitmap positions."""
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def intern(self, user_id):
+        index = self._indexes.get(user_id)
+        if index is None:
+            with self._lock:
+                index = self._indexes.setdefault(user_id, len(self._indexes))
+        return index
+
+    def lookup(self, user_id):
+        """Return the user's index, or None if the user has never voted."""
+        return self._indexes.get(user_id)
+
+
+class PresenceIndex:
+    """Which users have voted in one round, as one bitmap per vote choice."""
+
+    def __init__(self, interner, key, choices):
+        self.key = key
+        self._interner = interner
+        self._bitmaps = {choice: bytearray() for choice in choices}
+
+    def mark(self, user_id, choice):
+        """Record that a user voted `choice`, clearing any other choice they made before."""
+        byte, bit = divmod(self._interner.intern(user_id), 8)
+        for name, bitmap in self._bitmaps.items():
+            if name == choice:
+                if byte >= len(bitmap):
+                    bitmap.extend(bytes(byte - len(bitmap) + 1))
+                bitmap[byte] |= 1 << bit
+            elif byte < len(bitmap):
+                bitmap[byte] &= ~(1 << bit) & 0xFF
+
+    def unmark(self, user_id):
+        """Forget a user's vote in this round."""
+        index = self._interner.lookup(user_id)
+        if index is None:
+            return
+        byte, bit = divmod(index, 8)
+        for bitmap in self._bitmaps.values():
+            if byte < len(bitmap):
+                bitmap[byte] &= ~(1 << bit) & 0xFF
+
+    def choice(self, user_id):
+        """Return the user's vote choice in this round, or None if they haven't voted."""
+        index = self._interner.lookup(user_id)
+        if index is None:
+            return None
+        byte, bit = divmod(index, 8)
+        for name, bitmap in self._bitmaps.items():
+            if byte < len(bitmap) and bitmap[byte] & (1 << bit):
+                return name
+        return None
+
+
+class RoundSnapshot:
+    """Immutable view of the active Smash or Pass image and MFK group."""
+
+    __slots__ = ('version', 'smashpass', 'mfk', 'smashpass_presence', 'mfk_presence', 'upcoming')
+
+    def __init__(self, version=0, smashpass=None, mfk=None, smashpass_presence=None, mfk_presence=None,
+                 upcoming=()):
+        self.version = version
+        # None when no session is active, otherwise
+        # {'session_id': id, 'image': {'id', 'filename', 'name', 'version'} or None, 'error': message or None}
+        self.smashpass = smashpass
+        # None when no poll is active, otherwise
+        # {'poll_id': id, 'group': PollGroup.to_dict() or None}
+        self.mfk = mfk
+        # PresenceIndex for the current image / group, None when there is none
+        self.smashpass_presence = smashpass_presence
+        self.mfk_presence = mfk_presence
+        # Images of the next rounds, in the order they will be shown:
+        # ({'kind': 'smashpass' or 'mfk', 'id', 'filename', 'version'}, ...)
+        self.upcoming = tuple(upcoming)
+
+
+def _build_smashpass(prefetch_count):
+    """Returns (snapshot, upcoming images)."""
+    session_obj = SmashPassSession.query.filter_by(status='active').order_by(
+        SmashPassSession.created_at.desc()
+    ).first()
+
+    if not session_obj:
+        return None, []
+
+    snapshot = {'session_id': session_obj.id, 'image': None, 'error': None}
+    image_order = json.loads(session_obj.image_order)
+
+    if session_obj.current_image_index >= len(image_order):
+        snapshot['error'] = 'Session completed'
+        return snapshot, []
+
+    # Load the current image and the next few in one query
+    window = image_order[session_obj.current_image_index:session_obj.current_image_index + 1 + prefetch_count]
+    images = {image.id: image for image in Image.query.filter(Image.id.in_(window)).all()}
+    upcoming = [
+        {'kind': 'smashpass', 'id': images[image_id].id, 'filename': images[image_id].filename}
+        for image_id in window[1:] if image_id in images
+    ]
+
+    current_image = images.get(window[0])
+    if not current_image:
+        snapshot['error'] = 'Image not found'
+        return snapshot, upcoming
+
+    snapshot['image'] = {
+        'id': current_image.id,
+        'filename': current_image.filename,
+        'name': os.path.splitext(current_image.filename)[0]
+    }
+    return snapshot, upcoming
+
+
+def _build_mfk(prefetch_count):
+    """Returns (snapshot, upcoming images)."""
+    poll = Poll.query.filter_by(status='active').order_by(Poll.created_at.desc()).first()
+
+    if not poll:
+        return None, []
+
+    current_group = PollGroup.query.options(
+        joinedload(PollGroup.image1),
+        joinedload(PollGroup.image2),
+        joinedload(PollGroup.image3)
+    ).filter_by(
+        poll_id=poll.id,
+        group_number=poll.current_group
+    ).first()
+
+    upcoming = []
+    if prefetch_count:
+        next_groups = PollGroup.query.options(
+            joinedload(PollGroup.image1),
+            joinedload(PollGroup.image2),
+            joinedload(PollGroup.image3)
+        ).filter(
+            PollGroup.poll_id == poll.id,
+            PollGroup.group_number > poll.current_group,
+            PollGroup.group_number <= poll.current_group + prefetch_count
+        ).order_by(PollGroup.group_number).all()
+        for group in next_groups:
+            for image in (group.image1, group.image2, group.image3):
+                upcoming.append({'kind': 'mfk', 'id': image.id, 'filename': image.filename})
+
+    return {
+        'poll_id': poll.id,
+        'group': current_group.to_dict() if current_group else None
+    }, upcoming
+
+
+def _seed_smashpass_presence(interner, key):
+    _, session_id, image_id = key
+    presence = PresenceIndex(interner, key, ('smash', 'pass'))
+    rows = db.session.query(SmashPassVote.user_id, SmashPassVote.vote).filter_by(
+        session_id=session_id,
+        image_id=image_id
+    ).all()
+    for user_id, vote in rows:
+        presence.mark(user_id, vote)
+    return presence
+
+
+def _seed_mfk_presence(interner, key):
+    _, group_id = key
+    presence = PresenceIndex(interner, key, ('submitted',))
+    rows = db.session.query(Submission.user_id).filter_by(group_id=group_id).all()
+    for (user_id,) in rows:
+        presence.mark(user_id, 'submitted')
+    return presence
+
+
+class ActiveRound:
+    """Holds the current RoundSnapshot and rebuilds it on admin state changes."""
+
+    def __init__(self, prefetch_count=3, image_version=None):
+        # How many upcoming Smash or Pass images / MFK groups clients preload
+        self.prefetch_count = prefetch_count
+        # image_version(filename) -> content hash, added to every image as 'version'
+        self.image_version = image_version
+        self._snapshot = RoundSnapshot()
+        self._lock = threading.Lock()
+        self._interner = UserInterner()
+
+    def _presence(self, previous, key, seed):
+        """Keep the presence index if the round didn't change, otherwise seed a new one."""
+        if key is None:
+            return None
+        if previous is not None and previous.key == key:
+            return previous
+        return seed(self._interner, key)
+
+    @property
+    def current(self):
+        """The latest snapshot. Only its presence indexes are updated in place."""
+        return self._snapshot
+
+    def rebuild(self):
+        """Re-read the active session and poll from the database and swap in a new snapshot."""
+        with self._lock:
+            previous = self._snapshot
+            smashpass, smashpass_upcoming = _build_smashpass(self.prefetch_count)
+            mfk, mfk_upcoming = _build_mfk(self.prefetch_count)
+            if self.image_version:
+                self._add_versions(smashpass, mfk, smashpass_upcoming + mfk_upcoming)
+
+            smashpass_key = None
+            if smashpass and smashpass['image']:
+                smashpass_key = ('smashpass', smashpass['session_id'], smashpass['image']['id'])
+            mfk_key = None
+            if mfk and mfk['group']:
+                mfk_key = ('mfk', mfk['group']['id'])
+
+            self._snapshot = RoundSnapshot(
+                version=previous.version + 1,
+                smashpass=smashpass,
+                mfk=mfk,
+                smashpass_presence=self._presence(previous.smashpass_presence, smashpass_key, _seed_smashpass_presence),
+                mfk_presence=self._presence(previous.mfk_presence, mfk_key, _seed_mfk_presence),
+                upcoming=smashpass_upcoming + mfk_upcoming
+            )
+            return self._snapshot
+
+    def _add_versions(self, smashpass, mfk, upcoming):
+        images = list(upcoming)
+        if smashpass and smashpass['image']:
+            images.append(smashpass['image'])
+        if mfk and mfk['group']:
+            images.extend(mfk['group']['images'])
+        for image in images:
+            image['version'] = self.image_version(image['filename'])
+
+    def smashpass_presence(self, session_id, image_id):
+        """Presence index for an image if it is the one currently shown, else None."""
+        presence = self._snapshot.smashpass_presence
+        if presence is not None and presence.key == ('smashpass', session_id, image_id):
+            return presence
+        return None
+
+    def mfk_presence(self, group_id):
+        """Presence index for a poll group if it is the one currently shown, else None."""
+        presence = self._snapshot.mfk_presence
+        if presence is not None and presence.key == ('mfk', group_id):
+            return presence
+        return None
@@ -1,21 +1,32 @@
 """
 Main Flask application for the Marry, F, Kill Quiz.
 """
+import atexit
 import os
 import random
+import time
 import uuid
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_from_directory, session
-from flask_socketio import SocketIO, emit, join_room
+from flask import Flask, Response, g, render_template, request, jsonify, session, stream_with_context
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_httpauth import HTTPBasicAuth
 from werkzeug.utils import secure_filename
-import qrcode
-from io import BytesIO
-import base64
-from database import db, init_db, Image, Poll, PollGroup, Submission, SmashPassSession, SmashPassVote
-from sqlalchemy import func
+from database import db, init_db, sqlite_report, bump_state_version, get_state_version, upsert_smashpass_votes, upsert_submissions, Image, Poll, PollGroup, Submission, SmashPassSession, SmashPassVote
+from tallies import SmashPassTally, GroupTally
+from vote_queue import VoteWriteQueue, new_row
+from active_round import ActiveRound
+from broadcast import BroadcastCoalescer
+from live_results import LiveResults
+from cluster import StateSync, socketio_queue_options
+from image_variants import ImageVariants, VARIANTS
+from http_cache import FileHashes, Precompressor, send_cached_file, send_hashed_path, send_bytes
+from qr_codes import QRCodes
+from uploads import ImageUploads, UploadRejected
+from metrics import Registry, observe_commits
+from sql_profiler import SQLProfiler
+from sqlalchemy import case, func, literal, select, union_all
+from sqlalchemy.exc import IntegrityError
 import json
-from PIL import Image as PILImage
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -25,14 +36,140 @@ data_dir = os.path.join(app.root_path, 'data')
 if not os.path.exists(data_dir):
     os.makedirs(data_dir)
 db_path = os.path.join(data_dir, 'fmk_quiz.db')
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+# DATABASE_URL points every node of a multi-node deployment at one shared database
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', f'sqlite:///{db_path}')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-# Initialize database
+# Initialize database (SQLite pragmas and pool come from SQLITE_* env vars)
 init_db(app)
-
-# Initialize SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
+with app.app_context():
+    sqlite_settings = sqlite_report()
+if sqlite_settings:
+    print('SQLite settings: ' + ', '.join(f'{key}={value}' for key, value in sqlite_settings.items()))
+
+# Opt-in per-request SQL profiling: Server-Timing headers, slow-request and N+1 warnings
+if os.environ.get('SQL_PROFILE', '').lower() in ('1', 'true', 'yes'):
+    sql_profiler = SQLProfiler(
+        slow_ms=int(os.environ.get('SQL_PROFILE_SLOW_MS', 200)),
+        repeat_threshold=int(os.environ.get('SQL_PROFILE_REPEAT_THRESHOLD', 10))
+    )
+    with app.app_context():
+        sql_profiler.init_app(app, db.engine)
+    print(f'SQL profiling on: slow requests >= {sql_profiler.slow * 1000:g}ms, '
+          f'N+1 warning above {sql_profiler.repeat_threshold} repeats')
+
+# Live Smash or Pass counters, rebuilt from the votes table for active sessions
+sp_tally = SmashPassTally()
+with app.app_context():
+    sp_tally.warm()
+
+# Live MFK marry/f/kill counters per poll group, built on first access
+group_tally = GroupTally()
+
+# Final results of completed Smash or Pass sessions, keyed by session id
+smashpass_results_cache = {}
+
+# Resized WebP/JPEG copies of every image, served by /images/<variant>/<filename>
+# (missing ones are built in the background once the app is up, see build_variants_in_background)
+image_variants = ImageVariants(os.path.join(app.root_path, 'images'), os.path.join(data_dir, 'image_variants'))
+
+# Content hashes for ETags and ?v= cache-busting URLs of images and static files
+file_hashes = FileHashes()
+
+
+def image_version(filename):
+    """Content hash of an original image, sent as `version` with round images for their ?v= URLs."""
+    return file_hashes.get(os.path.join(image_variants.images_dir, filename))
+
+
+# Gzip/brotli copies of static JS and CSS, rebuilt when a file changes
+static_precompressor = Precompressor(app.static_folder, os.path.join(data_dir, 'static_compressed'))
+compressed = static_precompressor.build()
+if compressed:
+    print(f'Precompressed {compressed} static files ({", ".join(static_precompressor.encodings())})')
+
+# Rendered join QR codes, one per host URL; QR_MAX_AGE is the browser cache lifetime of /qr/*.png
+qr_codes = QRCodes(maxsize=int(os.environ.get('QR_CACHE_SIZE', 32)))
+QR_MAX_AGE = int(os.environ.get('QR_MAX_AGE', 3600))
+QR_TARGETS = {'poll': '/poll', 'smashpass': '/'}
+
+# What voters are currently shown; rebuilt by admin routes that change state.
+# PREFETCH_ROUNDS upcoming images / groups are announced for clients to preload.
+active_round = ActiveRound(prefetch_count=int(os.environ.get('PREFETCH_ROUNDS', 3)), image_version=image_version)
+with app.app_context():
+    active_round.rebuild()
+
+# Prometheus-style metrics for /metrics; each worker process reports its own
+metrics_registry = Registry()
+request_latency = metrics_registry.histogram(
+    'fmk_http_request_duration_seconds', 'HTTP request latency by route', ('method', 'route'))
+requests_total = metrics_registry.counter(
+    'fmk_http_requests_total', 'HTTP requests by route and status', ('method', 'route', 'status'))
+votes_total = metrics_registry.counter(
+    'fmk_votes_total', 'Votes accepted, by vote kind and transport', ('kind', 'transport'))
+socket_emits_total = metrics_registry.counter(
+    'fmk_socketio_emits_total', 'Socket.IO broadcasts sent by this worker, by event', ('event',))
+image_bytes_total = metrics_registry.counter(
+    'fmk_image_bytes_served_total', 'Image bytes sent, originals or resized variants', ('kind',))
+commit_latency = metrics_registry.histogram(
+    'fmk_db_commit_duration_seconds', 'Database session commit latency, flush included')
+observe_commits(commit_latency)
+
+# Initialize SocketIO; SOCKETIO_MESSAGE_QUEUE relays events between workers
+SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE', '')
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode='eventlet',
+    **socketio_queue_options(SOCKETIO_MESSAGE_QUEUE, os.environ.get('SOCKETIO_CHANNEL', 'fmk-quiz'))
+)
+
+# Optional write-behind mode: votes are queued and written in batched transactions
+vote_queue = None
+if os.environ.get('VOTE_WRITE_BEHIND', '').lower() in ('1', 'true', 'yes'):
+    vote_queue = VoteWriteQueue(
+        app,
+        max_depth=int(os.environ.get('VOTE_QUEUE_MAX_DEPTH', 10000)),
+        batch_size=int(os.environ.get('VOTE_FLUSH_BATCH_SIZE', 200)),
+        flush_interval=int(os.environ.get('VOTE_FLUSH_INTERVAL_MS', 5)) / 1000
+    )
+    vote_queue.start(socketio)
+    atexit.register(vote_queue.drain)
+
+# Live result broadcasts are sent at most once per room per tick (0 sends every update)
+broadcaster = BroadcastCoalescer(app, socketio, interval=int(os.environ.get('BROADCAST_INTERVAL_MS', 150)) / 1000,
+                                 on_emit=socket_emits_total.inc)
+broadcaster.start()
+
+# Multi-worker mode: each worker reloads shared state changed by the others
+state_sync = None
+round_version = None
+if SOCKETIO_MESSAGE_QUEUE:
+    state_sync = StateSync(
+        app,
+        socketio,
+        interval=int(os.environ.get('STATE_SYNC_INTERVAL_MS', 500)) / 1000,
+        sync=lambda: sync_shared_state()  # defined with the helpers below
+    )
+    state_sync.start()
+    print(f'Multi-worker mode: Socket.IO message queue {SOCKETIO_MESSAGE_QUEUE.split("://")[0]}://')
+
+# Socket.IO rooms by client role. Voters only get round state changes; live
+# tallies go to dashboards through per-stream result rooms.
+ROLE_ROOMS = {
+    'voter': 'voters',
+    'dashboard': 'dashboard'
+}
+STATE_EVENT_ROOMS = {
+    'vote_changed': ['voters'],
+    'poll_started': ['voters', 'dashboard'],
+    'group_changed': ['voters', 'dashboard'],
+    'poll_ended': ['voters', 'dashboard'],
+    'smashpass_started': ['voters', 'dashboard'],
+    'smashpass_next_image': ['voters', 'dashboard'],
+    'smashpass_completed': ['voters', 'dashboard'],
+    'prefetch_manifest': ['voters']
+}
 
 # Initialize HTTP Basic Auth
 auth = HTTPBasicAuth()
@@ -41,6 +178,16 @@ auth = HTTPBasicAuth()
 ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'admin123')  # Default password for development
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+# Whole-request limit of /admin/images/upload/bulk
+MAX_BULK_UPLOAD_SIZE = int(os.environ.get('MAX_BULK_UPLOAD_MB', 200)) * 1024 * 1024
+# Room for multipart boundaries and headers around a single file
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Uploads are streamed to disk and verified off the eventlet hub
+image_uploads = ImageUploads(image_variants, MAX_FILE_SIZE, offload=socketio.async_mode == 'eventlet')
+
+# Images whose variants are being built in the background after a cache miss, or failed to build
+variant_builds = set()
 
 
 @auth.verify_password
@@ -60,15 +207,217 @@ def allowed_file(filename):
 
 def generate_qr_code(url):
     """Generate a QR code as a base64-encoded image."""
-    qr = qrcode.QRCode(version=1, box_size=10, border=1)
-    qr.add_data(url)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
+    return qr_codes.data_url(url)
+
+
+def qr_target_url(target):
+    """The join link a QR code points at, on the host the request came in on."""
+    return f"{request.host_url.rstrip('/')}{QR_TARGETS[target]}"
+
+
+def build_variants_in_background(filenames):
+    """
+    Build the missing variants of images one at a time in a background task.
+    Each image is built at most once; requests get the original until then.
+    """
+    filenames = [filename for filename in filenames if filename not in variant_builds]
+    if not filenames:
+        return
+    variant_builds.update(filenames)
+
+    def build():
+        built = 0
+        for filename in filenames:
+            try:
+                if not image_variants.is_current(filename):
+                    image_uploads.build_variants(filename)
+                    built += 1
+            except Exception as e:
+                # Pillow could not decode it; requests keep getting the original without retrying
+                print(f'Could not build variants for {filename}: {e}')
+                continue
+            variant_builds.discard(filename)
+        if len(filenames) > 1 and built:
+            print(f'Built image variants for {built} images')
+
+    socketio.start_background_task(build)
+
+
+# Images added or changed while the app was down; checked here, built after startup
+with app.app_context():
+    build_variants_in_background([
+        image.filename for image in Image.query.all() if not image_variants.is_current(image.filename)
+    ])
 
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    return f"data:image/png;base64,{img_str}"
+
+def save_uploaded_image(stream, original_filename):
+    """Validate, store and register one uploaded image. Raises UploadRejected."""
+    if not original_filename:
+        raise UploadRejected('No file selected')
+
+    if not allowed_file(original_filename):
+        raise UploadRejected('Invalid file type. Allowed: PNG, JPG, JPEG, GIF, WEBP')
+
+    # Sanitize filename
+    filename = secure_filename(original_filename)
+    if not allowed_file(filename):
+        raise UploadRejected('Invalid filename')
+
+    # Check for duplicate filename before reading the body
+    if Image.query.filter_by(filename=filename).first():
+        raise UploadRejected(f'Image with filename "{filename}" already exists')
+
+    temp_path = image_uploads.receive(stream)
+    image_uploads.verify(temp_path)
+
+    # Publish the file and its resized copies before the row makes it visible.
+    # Publishing claims the file name, so a concurrent upload of the same name is rejected here.
+    image_uploads.publish(temp_path, filename)
+
+    new_image = Image(filename=filename, is_active=True)
+    db.session.add(new_image)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A row took the name after the check above without going through publish (a rename)
+        db.session.rollback()
+        raise UploadRejected(f'Image with filename "{filename}" already exists')
+    except Exception:
+        db.session.rollback()
+        # Nothing refers to the published file, so give the name back for a retry
+        image_uploads.unpublish(filename)
+        raise
+    return new_image
+
+
+def record_mfk_submission(data, user_id, transport='http'):
+    """
+    Validate and record a user's choices for a poll group.
+
+    Shared by POST /poll/submit and the submit_mfk socket event (`transport`
+    labels the vote metric). Returns (response dict, HTTP status).
+    """
+    # Validate required fields
+    required_fields = ['poll_id', 'group_id', 'marry_image_id', 'f_image_id', 'kill_image_id']
+    if not all(field in data for field in required_fields):
+        return {'error': 'Missing required fields'}, 400
+
+    # Verify poll and group exist
+    poll = Poll.query.get(data['poll_id'])
+    group = PollGroup.query.get(data['group_id'])
+
+    if not poll or not group:
+        return {'error': 'Invalid poll or group'}, 404
+
+    if poll.status != 'active':
+        return {'error': 'Poll is not active'}, 400
+
+    # Verify all three image IDs are different
+    image_ids = [data['marry_image_id'], data['f_image_id'], data['kill_image_id']]
+    if len(set(image_ids)) != 3:
+        return {'error': 'Each image must be assigned to a different category'}, 400
+
+    # Verify all images belong to this group
+    group_image_ids = [group.image1_id, group.image2_id, group.image3_id]
+    if not all(img_id in group_image_ids for img_id in image_ids):
+        return {'error': 'Invalid image selection'}, 400
+
+    submission = {
+        'poll_id': poll.id,
+        'group_id': group.id,
+        'user_id': user_id,
+        'marry_image_id': data['marry_image_id'],
+        'f_image_id': data['f_image_id'],
+        'kill_image_id': data['kill_image_id']
+    }
+
+    if vote_queue:
+        # Write-behind mode: acknowledge as soon as the submission is queued
+        group_tally.ensure_loaded(group.id)
+        if not vote_queue.put(vote_queue.submission_key(group.id, user_id), new_row('submission', **submission)):
+            return {'error': 'Server busy, please try again'}, 503
+    else:
+        # Insert, or replace the user's earlier submission for this group
+        upsert_submissions([dict(submission, submitted_at=datetime.utcnow())])
+        db.session.commit()
+
+    group_tally.record(group.id, user_id, image_ids)
+    votes_total.inc('mfk', transport)
+    presence = active_round.mfk_presence(group.id)
+    if presence:
+        presence.mark(user_id, 'submitted')
+
+    # Get updated results
+    results = get_group_results(group.id)
+
+    # Send the changed counters to the group's stream subscribers on the next tick
+    stream = f'group:{group.id}'
+    broadcaster.mark_dirty('results_delta', stream, lambda: live_results.delta(stream))
+
+    return {
+        'success': True,
+        'results': results
+    }, 200
+
+
+def record_smashpass_vote(data, user_id, transport='http'):
+    """
+    Validate and record a Smash or Pass vote.
+
+    Shared by POST /smashpass/vote and the cast_smashpass_vote socket event
+    (`transport` labels the vote metric). Returns (response dict, HTTP status).
+    """
+
+    # Validate required fields
+    if 'session_id' not in data or 'image_id' not in data or 'vote' not in data:
+        return {'error': 'Missing required fields'}, 400
+
+    if data['vote'] not in ['smash', 'pass']:
+        return {'error': 'Invalid vote. Must be "smash" or "pass"'}, 400
+
+    # Verify session exists and is active
+    session_obj = SmashPassSession.query.get(data['session_id'])
+    if not session_obj or session_obj.status != 'active':
+        return {'error': 'Invalid or inactive session'}, 400
+
+    # Verify image exists
+    image = Image.query.get(data['image_id'])
+    if not image:
+        return {'error': 'Image not found'}, 404
+
+    vote = {
+        'session_id': session_obj.id,
+        'image_id': image.id,
+        'user_id': user_id,
+        'vote': data['vote']
+    }
+
+    if vote_queue:
+        # Write-behind mode: acknowledge as soon as the vote is queued
+        sp_tally.ensure_loaded(session_obj.id)
+        if not vote_queue.put(vote_queue.smashpass_key(session_obj.id, image.id, user_id), new_row('smashpass', **vote)):
+            return {'error': 'Server busy, please try again'}, 503
+    else:
+        # Insert, or replace the user's earlier vote for this image
+        upsert_smashpass_votes([dict(vote, submitted_at=datetime.utcnow())])
+        db.session.commit()
+
+    # Get updated counts
+    smash_count, pass_count = sp_tally.record(session_obj.id, image.id, user_id, data['vote'])
+    votes_total.inc('smashpass', transport)
+    presence = active_round.smashpass_presence(session_obj.id, image.id)
+    if presence:
+        presence.mark(user_id, data['vote'])
+
+    # Send the changed counters to the image's stream subscribers on the next tick
+    stream = f'smashpass:{session_obj.id}:{image.id}'
+    broadcaster.mark_dirty('results_delta', stream, lambda: live_results.delta(stream))
+
+    return {
+        'success': True,
+        'smash_count': smash_count,
+        'pass_count': pass_count
+    }, 200
 
 
 def get_or_create_user_id():
@@ -78,41 +427,350 @@ def get_or_create_user_id():
     return session['user_id']
 
 
-def get_group_results(group_id):
-    """Calculate results for a specific poll group."""
-    submissions = Submission.query.filter_by(group_id=group_id).all()
+def find_smashpass_vote(session_id, image_id, user_id):
+    """Return the user's vote for an image ('smash', 'pass' or None), including queued votes."""
+    # The image on screen is answered from memory
+    presence = active_round.smashpass_presence(session_id, image_id)
+    if presence:
+        return presence.choice(user_id)
+
+    if vote_queue:
+        pending = vote_queue.get(vote_queue.smashpass_key(session_id, image_id, user_id))
+        if pending:
+            return pending['vote']
+
+    existing_vote = SmashPassVote.query.filter_by(
+        session_id=session_id,
+        image_id=image_id,
+        user_id=user_id
+    ).first()
+    return existing_vote.vote if existing_vote else None
+
+
+def find_submission(group_id, user_id):
+    """Return the user's (marry, f, kill) image ids for a group or None, including queued submissions."""
+    if vote_queue:
+        pending = vote_queue.get(vote_queue.submission_key(group_id, user_id))
+        if pending:
+            return (pending['marry_image_id'], pending['f_image_id'], pending['kill_image_id'])
+
+    existing = Submission.query.filter_by(group_id=group_id, user_id=user_id).first()
+    if not existing:
+        return None
+    return (existing.marry_image_id, existing.f_image_id, existing.kill_image_id)
 
-    if not submissions:
+
+def has_submitted(group_id, user_id):
+    """Check whether the user has submitted for a group, including queued submissions."""
+    # The group on screen is answered from memory
+    presence = active_round.mfk_presence(group_id)
+    if presence:
+        return presence.choice(user_id) is not None
+    return find_submission(group_id, user_id) is not None
+
+
+def group_stream_state(group_id):
+    """Current counters of an MFK group for its live result stream."""
+    aggregate = group_aggregate(group_id)
+    if not aggregate:
         return None
+    return {
+        'counts': {image_id: dict(counts) for image_id, counts in aggregate['counts'].items()},
+        'total': aggregate['total'],
+        'images': [{'image_id': image_id, 'filename': filename} for image_id, filename in aggregate['images']]
+    }
+
+
+def emit_state(event, data):
+    """Broadcast a round state change to the roles that listen for it."""
+    socketio.emit(event, data, room=STATE_EVENT_ROOMS[event])
+    socket_emits_total.inc(event)
 
-    # Get the group to know which images are included
-    group = PollGroup.query.get(group_id)
-    if not group:
+
+def completed_smashpass_counts(session_id, image_id):
+    """(smash, pass) counts of an image in a completed session, or None if it is not one."""
+    session_obj = db.session.get(SmashPassSession, session_id)
+    if not session_obj or session_obj.status != 'completed' or image_id not in json.loads(session_obj.image_order):
         return None
+    # Counted in the database, so finished sessions are not loaded back into the live tally
+    counts = dict(db.session.query(SmashPassVote.vote, func.count()).filter_by(
+        session_id=session_id,
+        image_id=image_id
+    ).group_by(SmashPassVote.vote).all())
+    return counts.get('smash', 0), counts.get('pass', 0)
+
+
+def smashpass_stream_state(session_id, image_id):
+    """
+    Current counters of a Smash or Pass image for its live result stream.
+
+    Only the image on screen and the images of completed sessions can be
+    subscribed to; anything else returns None.
+    """
+    sp_round = active_round.current.smashpass
+    if sp_round and sp_round['session_id'] == session_id and sp_round['image'] \
+            and sp_round['image']['id'] == image_id:
+        smash_count, pass_count = sp_tally.get(session_id, image_id)
+    else:
+        counts = completed_smashpass_counts(session_id, image_id)
+        if counts is None:
+            return None
+        smash_count, pass_count = counts
+    return {
+        'counts': {image_id: {'smash': smash_count, 'pass': pass_count}},
+        'total': smash_count + pass_count,
+        'session_id': session_id,
+        'image_id': image_id
+    }
 
-    image_ids = [group.image1_id, group.image2_id, group.image3_id]
-    results = {image_id: {'marry': 0, 'f': 0, 'kill': 0} for image_id in image_ids}
 
-    for sub in submissions:
-        results[sub.marry_image_id]['marry'] += 1
-        results[sub.f_image_id]['f'] += 1
-        results[sub.kill_image_id]['kill'] += 1
+live_results = LiveResults({
+    'group': group_stream_state,
+    'smashpass': smashpass_stream_state
+})
+
+
+def forget_finished_tallies():
+    """
+    Drop the live counters of sessions and groups no longer on screen, so
+    finished rounds and their ballots don't stay in memory.
+    """
+    snapshot = active_round.current
+    session_id = snapshot.smashpass['session_id'] if snapshot.smashpass else None
+    group_id = snapshot.mfk['group']['id'] if snapshot.mfk and snapshot.mfk['group'] else None
+    for loaded_id in sp_tally.loaded():
+        if loaded_id != session_id:
+            sp_tally.forget(loaded_id)
+    for loaded_id in group_tally.loaded():
+        if loaded_id != group_id:
+            group_tally.forget(loaded_id)
+
+
+def recount_dropped_votes(rows):
+    """
+    Re-read the counters and presence of the images and groups whose queued
+    votes could not be written, which were counted when they were accepted.
+    """
+    # Votes still queued for the same rounds must be in the database before it is re-read
+    vote_queue.drain()
+
+    images = {}
+    groups = {}
+    for row in rows:
+        if row['kind'] == 'smashpass':
+            images.setdefault((row['session_id'], row['image_id']), set()).add(row['user_id'])
+        else:
+            groups.setdefault(row['group_id'], set()).add(row['user_id'])
+
+    for (session_id, image_id), user_ids in images.items():
+        ballots = sp_tally.refresh(session_id, image_id)
+        presence = active_round.smashpass_presence(session_id, image_id)
+        if presence:
+            for user_id in user_ids:
+                if user_id in ballots:
+                    presence.mark(user_id, ballots[user_id])
+                else:
+                    presence.unmark(user_id)
+        stream = f'smashpass:{session_id}:{image_id}'
+        broadcaster.mark_dirty('results_delta', stream, lambda stream=stream: live_results.delta(stream))
+
+    for group_id, user_ids in groups.items():
+        # Groups that are not in memory are read from the database anyway
+        if group_id not in group_tally.loaded():
+            continue
+        aggregate = group_tally.refresh(group_id)
+        ballots = aggregate['ballots'] if aggregate else {}
+        presence = active_round.mfk_presence(group_id)
+        if presence:
+            for user_id in user_ids:
+                if user_id not in ballots:
+                    presence.unmark(user_id)
+        stream = f'group:{group_id}'
+        broadcaster.mark_dirty('results_delta', stream, lambda stream=stream: live_results.delta(stream))
+
+
+if vote_queue:
+    vote_queue.on_dropped = recount_dropped_votes
+
+
+def refresh_active_round():
+    """Rebuild the active round snapshot after an admin state change."""
+    # Presence for a newly shown round is seeded from the database, so write queued votes first
+    if vote_queue:
+        vote_queue.drain()
+    active_round.rebuild()
+    forget_finished_tallies()
+    if state_sync:
+        # Tell the other workers to rebuild their snapshot too
+        bump_state_version('round')
+        db.session.commit()
+    # Open dashboards get the new state pushed instead of polling for it
+    push_dashboard_state()
+    # Clients preload the next rounds' images while voters are busy with this one
+    emit_state('prefetch_manifest', prefetch_manifest())
+
 
-    total_submissions = len(submissions)
+def prefetch_manifest():
+    """Images of the next rounds for clients to preload, with the content hashes used in their URLs."""
+    snapshot = active_round.current
+    return {
+        'round': snapshot.version,
+        'images': list(snapshot.upcoming)
+    }
+
+
+def sync_shared_state():
+    """
+    Pick up admin changes and votes made by other workers (multi-worker mode).
+
+    Rebuilds the round snapshot when the shared round version moved, then
+    re-reads the counters of the image and group on screen and queues their
+    result deltas for this worker's subscribers.
+    """
+    global round_version
+    version = get_state_version('round')
+    if version != round_version:
+        round_version = version
+        if vote_queue:
+            vote_queue.drain()
+        previous = active_round.current.smashpass
+        active_round.rebuild()
+        forget_finished_tallies()
+        # Votes other workers took on the image just left may not have been synced yet
+        if previous and previous['image']:
+            sp_tally.refresh(previous['session_id'], previous['image']['id'])
+
+    # Write this worker's queued votes so the re-read counters include them
+    if vote_queue:
+        vote_queue.drain()
+
+    snapshot = active_round.current
+    if snapshot.smashpass and snapshot.smashpass['image']:
+        session_id, image_id = snapshot.smashpass['session_id'], snapshot.smashpass['image']['id']
+        ballots = sp_tally.refresh(session_id, image_id)
+        presence = active_round.smashpass_presence(session_id, image_id)
+        if presence:
+            for user_id, vote in ballots.items():
+                presence.mark(user_id, vote)
+        stream = f'smashpass:{session_id}:{image_id}'
+        broadcaster.mark_dirty('results_delta', stream, lambda: live_results.delta(stream))
+
+    if snapshot.mfk and snapshot.mfk['group']:
+        group_id = snapshot.mfk['group']['id']
+        aggregate = group_tally.refresh(group_id)
+        presence = active_round.mfk_presence(group_id)
+        if presence and aggregate:
+            for user_id in aggregate['ballots']:
+                presence.mark(user_id, 'submitted')
+        group_stream = f'group:{group_id}'
+        broadcaster.mark_dirty('results_delta', group_stream, lambda: live_results.delta(group_stream))
+
+
+def poll_dashboard_state():
+    """Current poll and group for the MFK dashboard, or None if no poll is in setup or active."""
+    poll = Poll.query.filter(Poll.status.in_(['setup', 'active'])).order_by(Poll.created_at.desc()).first()
+
+    if not poll:
+        return None
+
+    # Get current group if poll is active
+    current_group_data = None
+    if poll.status == 'active' and poll.current_group is not None:
+        current_group = PollGroup.query.filter_by(
+            poll_id=poll.id,
+            group_number=poll.current_group
+        ).first()
+        if current_group:
+            current_group_data = current_group.to_dict()
+            for image in current_group_data['images']:
+                image['version'] = image_version(image['filename'])
+            # Add submission count
+            aggregate = group_tally.get(current_group.id)
+            current_group_data['submission_count'] = aggregate['total'] if aggregate else 0
+
+    return {
+        'poll': poll.to_dict(),
+        'current_group': current_group_data
+    }
+
+
+def smashpass_dashboard_state():
+    """Latest Smash or Pass session and its current image for the dashboard, or None."""
+    session_obj = SmashPassSession.query.filter(
+        SmashPassSession.status.in_(['setup', 'active', 'completed'])
+    ).order_by(SmashPassSession.created_at.desc()).first()
+
+    if not session_obj:
+        return None
+
+    image_order = json.loads(session_obj.image_order)
+    current_image = None
+
+    if session_obj.status == 'active' and session_obj.current_image_index < len(image_order):
+        current_image_id = image_order[session_obj.current_image_index]
+        current_image_obj = Image.query.get(current_image_id)
+
+        if current_image_obj:
+            # Get vote counts for current image
+            smash_count, pass_count = sp_tally.get(session_obj.id, current_image_id)
+
+            current_image = {
+                'id': current_image_obj.id,
+                'filename': current_image_obj.filename,
+                'name': os.path.splitext(current_image_obj.filename)[0],
+                'version': image_version(current_image_obj.filename),
+                'smash_count': smash_count,
+                'pass_count': pass_count,
+                'total_votes': smash_count + pass_count
+            }
+
+    return {
+        'session': session_obj.to_dict(),
+        'current_image': current_image,
+        'total_images': len(image_order),
+        'images_remaining': len(image_order) - session_obj.current_image_index
+    }
+
+
+def push_dashboard_state(to=None):
+    """Send the MFK and Smash or Pass dashboard state to one client or every open dashboard."""
+    socketio.emit('dashboard_state', {
+        'poll': poll_dashboard_state(),
+        'smashpass': smashpass_dashboard_state()
+    }, room=to or ROLE_ROOMS['dashboard'])
+    socket_emits_total.inc('dashboard_state')
+
+
+def group_aggregate(group_id):
+    """Live aggregate of the group on screen; other groups are read without being kept in memory."""
+    mfk_round = active_round.current.mfk
+    if mfk_round and mfk_round['group'] and mfk_round['group']['id'] == group_id:
+        return group_tally.get(group_id)
+    return group_tally.read(group_id)
+
+
+def get_group_results(group_id):
+    """Calculate results for a specific poll group."""
+    aggregate = group_aggregate(group_id)
+
+    if not aggregate or aggregate['total'] == 0:
+        return None
+
+    total_submissions = aggregate['total']
 
     # Convert to percentage and include image info
     formatted_results = []
-    for image_id in image_ids:
-        image = Image.query.get(image_id)
+    for image_id, filename in aggregate['images']:
+        counts = aggregate['counts'][image_id]
         formatted_results.append({
             'image_id': image_id,
-            'filename': image.filename,
-            'marry': results[image_id]['marry'],
-            'f': results[image_id]['f'],
-            'kill': results[image_id]['kill'],
-            'marry_pct': round(results[image_id]['marry'] / total_submissions * 100, 1) if total_submissions > 0 else 0,
-            'f_pct': round(results[image_id]['f'] / total_submissions * 100, 1) if total_submissions > 0 else 0,
-            'kill_pct': round(results[image_id]['kill'] / total_submissions * 100, 1) if total_submissions > 0 else 0,
+            'filename': filename,
+            'marry': counts['marry'],
+            'f': counts['f'],
+            'kill': counts['kill'],
+            'marry_pct': round(counts['marry'] / total_submissions * 100, 1) if total_submissions > 0 else 0,
+            'f_pct': round(counts['f'] / total_submissions * 100, 1) if total_submissions > 0 else 0,
+            'kill_pct': round(counts['kill'] / total_submissions * 100, 1) if total_submissions > 0 else 0,
         })
 
     return {
@@ -124,58 +782,119 @@ def get_group_results(group_id):
 
 def get_cumulative_results(poll_id):
     """Calculate cumulative results across all groups in a poll."""
-    submissions = Submission.query.filter_by(poll_id=poll_id).all()
-
-    if not submissions:
+    if vote_queue:
+        vote_queue.drain()
+
+    # One row per (image, category) pick, so a single GROUP BY can count all three
+    picks = union_all(
+        select(Submission.marry_image_id.label('image_id'),
+               literal(1).label('marry'), literal(0).label('f'), literal(0).label('kill'))
+        .where(Submission.poll_id == poll_id),
+        select(Submission.f_image_id.label('image_id'),
+               literal(0).label('marry'), literal(1).label('f'), literal(0).label('kill'))
+        .where(Submission.poll_id == poll_id),
+        select(Submission.kill_image_id.label('image_id'),
+               literal(0).label('marry'), literal(0).label('f'), literal(1).label('kill'))
+        .where(Submission.poll_id == poll_id),
+    ).subquery()
+
+    rows = db.session.execute(
+        select(
+            Image.id,
+            Image.filename,
+            func.sum(picks.c.marry),
+            func.sum(picks.c.f),
+            func.sum(picks.c.kill)
+        ).join(picks, picks.c.image_id == Image.id)
+        .group_by(Image.id, Image.filename)
+        .order_by(func.sum(picks.c.marry).desc())
+    ).all()
+
+    if not rows:
         return None
 
-    # Get all unique images from this poll
-    poll = Poll.query.get(poll_id)
-    image_stats = {}
-
-    for sub in submissions:
-        # Track marry votes
-        if sub.marry_image_id not in image_stats:
-            image_stats[sub.marry_image_id] = {'marry': 0, 'f': 0, 'kill': 0}
-        image_stats[sub.marry_image_id]['marry'] += 1
-
-        # Track f votes
-        if sub.f_image_id not in image_stats:
-            image_stats[sub.f_image_id] = {'marry': 0, 'f': 0, 'kill': 0}
-        image_stats[sub.f_image_id]['f'] += 1
-
-        # Track kill votes
-        if sub.kill_image_id not in image_stats:
-            image_stats[sub.kill_image_id] = {'marry': 0, 'f': 0, 'kill': 0}
-        image_stats[sub.kill_image_id]['kill'] += 1
-
-    # Format results
+    # Format results (already sorted by most "marry" votes)
     formatted_results = []
-    for image_id, stats in image_stats.items():
-        image = Image.query.get(image_id)
-        total_votes = stats['marry'] + stats['f'] + stats['kill']
+    for image_id, filename, marry, f, kill in rows:
+        total_votes = marry + f + kill
         formatted_results.append({
             'image_id': image_id,
-            'filename': image.filename,
-            'marry': stats['marry'],
-            'f': stats['f'],
-            'kill': stats['kill'],
+            'filename': filename,
+            'marry': marry,
+            'f': f,
+            'kill': kill,
             'total_votes': total_votes,
-            'marry_pct': round(stats['marry'] / total_votes * 100, 1) if total_votes > 0 else 0,
-            'f_pct': round(stats['f'] / total_votes * 100, 1) if total_votes > 0 else 0,
-            'kill_pct': round(stats['kill'] / total_votes * 100, 1) if total_votes > 0 else 0,
+            'marry_pct': round(marry / total_votes * 100, 1) if total_votes > 0 else 0,
+            'f_pct': round(f / total_votes * 100, 1) if total_votes > 0 else 0,
+            'kill_pct': round(kill / total_votes * 100, 1) if total_votes > 0 else 0,
         })
 
-    # Sort by most "marry" votes
-    formatted_results.sort(key=lambda x: x['marry'], reverse=True)
-
     return {
         'poll_id': poll_id,
-        'total_submissions': len(submissions),
+        # Every submission marries exactly one image
+        'total_submissions': sum(row[2] for row in rows),
         'results': formatted_results
     }
 
 
+# ============================================================================
+# METRICS
+# ============================================================================
+
+# Endpoints whose response bodies count as image bytes served
+IMAGE_ENDPOINTS = {'serve_image': 'original', 'serve_image_variant': 'variant'}
+
+
+def socket_room_sizes():
+    """Connected Socket.IO clients of this worker, per role room and in total."""
+    rooms = socketio.server.manager.rooms.get('/', {})
+    sizes = {(room,): len(rooms.get(room, ())) for room in ROLE_ROOMS.values()}
+    sizes[('all',)] = len(rooms.get(None, ()))
+    return sizes
+
+
+def qr_cache_lookups():
+    """Hits and misses of this worker's rendered QR code cache."""
+    info = qr_codes.cache_info()
+    return {('hit',): info.hits, ('miss',): info.misses}
+
+
+metrics_registry.gauge('fmk_socketio_clients', 'Connected Socket.IO clients per room', ('room',),
+                       func=socket_room_sizes)
+metrics_registry.counter('fmk_qr_cache_lookups_total', 'Rendered QR code lookups, by cache result', ('result',),
+                         func=qr_cache_lookups)
+metrics_registry.gauge('fmk_qr_cache_size', 'Rendered QR codes in the cache',
+                       func=lambda: {(): qr_codes.cache_info().currsize})
+if vote_queue:
+    metrics_registry.gauge('fmk_vote_queue_depth', 'Votes waiting to be written',
+                           func=lambda: {(): vote_queue.metrics()['queue_depth']})
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Observe the request's latency, status and, for images, bytes sent."""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_latency.observe(time.perf_counter() - started, request.method, route)
+        requests_total.inc(request.method, route, response.status_code)
+        if request.endpoint in IMAGE_ENDPOINTS and response.status_code == 200:
+            image_bytes_total.inc(IMAGE_ENDPOINTS[request.endpoint], amount=response.content_length or 0)
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+@auth.login_required
+def get_metrics():
+    """Metrics of this worker in the Prometheus text format."""
+    return Response(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 # ============================================================================
 # ROUTES - GENERAL
 # ============================================================================
@@ -206,72 +925,99 @@ def get_current_vote():
     """Get the currently active vote (either S/P or MFK)."""
     user_id = get_or_create_user_id()
 
+    snapshot = active_round.current
+
     # Check for active Smash or Pass session
-    sp_session = SmashPassSession.query.filter_by(status='active').order_by(
-        SmashPassSession.created_at.desc()
-    ).first()
+    sp_round = snapshot.smashpass
+    if sp_round and sp_round['image']:
+        existing_vote = find_smashpass_vote(sp_round['session_id'], sp_round['image']['id'], user_id)
 
-    if sp_session:
-        image_order = json.loads(sp_session.image_order)
-        if sp_session.current_image_index < len(image_order):
-            current_image_id = image_order[sp_session.current_image_index]
-            current_image = Image.query.get(current_image_id)
-
-            if current_image:
-                existing_vote = SmashPassVote.query.filter_by(
-                    session_id=sp_session.id,
-                    image_id=current_image_id,
-                    user_id=user_id
-                ).first()
-
-                return jsonify({
-                    'type': 'smashpass',
-                    'session_id': sp_session.id,
-                    'image': {
-                        'id': current_image.id,
-                        'filename': current_image.filename,
-                        'name': os.path.splitext(current_image.filename)[0]
-                    },
-                    'has_voted': existing_vote is not None,
-                    'vote': existing_vote.vote if existing_vote else None
-                })
+        return jsonify({
+            'type': 'smashpass',
+            'session_id': sp_round['session_id'],
+            'image': sp_round['image'],
+            'has_voted': existing_vote is not None,
+            'vote': existing_vote
+        })
 
     # Check for active MFK poll
-    poll = Poll.query.filter_by(status='active').order_by(Poll.created_at.desc()).first()
+    mfk_round = snapshot.mfk
+    if mfk_round and mfk_round['group']:
+        return jsonify({
+            'type': 'mfk',
+            'poll_id': mfk_round['poll_id'],
+            'group': mfk_round['group'],
+            'has_submitted': has_submitted(mfk_round['group']['id'], user_id)
+        })
 
-    if poll:
-        current_group = PollGroup.query.filter_by(
-            poll_id=poll.id,
-            group_number=poll.current_group
-        ).first()
+    return jsonify({'type': 'none', 'message': 'No active voting'}), 404
 
-        if current_group:
-            existing_submission = Submission.query.filter_by(
-                group_id=current_group.id,
-                user_id=user_id
-            ).first()
-
-            return jsonify({
-                'type': 'mfk',
-                'poll_id': poll.id,
-                'group': current_group.to_dict(),
-                'has_submitted': existing_submission is not None
-            })
 
-    return jsonify({'type': 'none', 'message': 'No active voting'}), 404
+@app.route('/vote/prefetch', methods=['GET'])
+def get_prefetch_manifest():
+    """Get the images of the next rounds so clients can preload them."""
+    return jsonify(prefetch_manifest())
 
 
 @app.route('/admin/mfk')
 @auth.login_required
 def mfk_admin():
     """MFK Admin dashboard page."""
+    # Lets this browser's socket join the dashboard room
+    session['dashboard'] = True
     return render_template('admin.html')
 
 
+@app.url_defaults
+def add_static_version(endpoint, values):
+    """Add the content hash to static file URLs so browsers can cache them as immutable."""
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        file_hash = file_hashes.get(os.path.join(app.static_folder, values['filename']))
+        if file_hash:
+            values['v'] = file_hash
+
+
+def serve_static(filename):
+    """Serve static files precompressed, with content-hash ETags."""
+    return send_cached_file(
+        app.static_folder, filename, file_hashes,
+        version=request.args.get('v'),
+        precompressed=static_precompressor
+    )
+
+
+app.view_functions['static'] = serve_static
+
+
 @app.route('/images/<filename>')
 def serve_image(filename):
     """Serve images from the images directory."""
-    return send_from_directory('images', filename)
+    return send_cached_file(image_variants.images_dir, filename, file_hashes, version=request.args.get('v'))
+
+
+@app.route('/images/<variant>/<filename>')
+def serve_image_variant(variant, filename):
+    """Serve a resized copy of an image, as WebP when the browser accepts it."""
+    if variant not in VARIANTS:
+        return jsonify({'error': 'Unknown image variant'}), 404
+    original = os.path.join(image_variants.images_dir, filename)
+    if not os.path.isfile(original):
+        return jsonify({'error': 'Image not found'}), 404
+
+    if not image_variants.is_current(filename):
+        # Building takes up to a second per image, so it never runs in the request.
+        # The original is sent without ?v= caching; revalidation later gets the variant.
+        build_variants_in_background([filename])
+        return send_cached_file(image_variants.images_dir, filename, file_hashes)
+
+    fmt = 'webp' if request.accept_mimetypes['image/webp'] else 'jpeg'
+    # ?v= carries the original's hash, which also identifies its variants
+    return send_hashed_path(
+        image_variants.path(filename, variant, fmt), file_hashes,
+        version=request.args.get('v'),
+        expected_version=file_hashes.get(original),
+        vary=('Accept',)
+    )
 
 
 # ============================================================================
@@ -294,6 +1040,7 @@ def toggle_image(image_id):
     image = Image.query.get_or_404(image_id)
     image.is_active = not image.is_active
     db.session.commit()
+    refresh_active_round()
     return jsonify(image.to_dict())
 
 
@@ -301,53 +1048,35 @@ def toggle_image(image_id):
 @auth.login_required
 def upload_image():
     """Upload a new image."""
+    if request.content_length and request.content_length > MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+        return jsonify({'error': f'File too large. Max size: {MAX_FILE_SIZE / 1024 / 1024}MB'}), 413
+
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
 
     file = request.files['file']
-
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
-
-    if not allowed_file(file.filename):
-        return jsonify({'error': 'Invalid file type. Allowed: PNG, JPG, JPEG, GIF, WEBP'}), 400
-
-    # Validate file size
-    file.seek(0, 2)  # Seek to end
-    file_size = file.tell()
-    file.seek(0)  # Reset to beginning
-
-    if file_size > MAX_FILE_SIZE:
-        return jsonify({'error': f'File too large. Max size: {MAX_FILE_SIZE / 1024 / 1024}MB'}), 400
-
-    # Validate it's actually an image
     try:
-        img = PILImage.open(file)
-        img.verify()
-        file.seek(0)  # Reset after verify
-    except Exception:
-        return jsonify({'error': 'Invalid image file'}), 400
+        new_image = save_uploaded_image(file.stream, file.filename)
+    except UploadRejected as e:
+        return jsonify({'error': str(e)}), e.status
 
-    # Sanitize filename
-    filename = secure_filename(file.filename)
-
-    # Check for duplicate filename
-    existing = Image.query.filter_by(filename=filename).first()
-    if existing:
-        return jsonify({'error': f'Image with filename "{filename}" already exists'}), 400
+    return jsonify({
+        'success': True,
+        'image': new_image.to_dict()
+    })
 
-    # Save file
-    images_dir = os.path.join(app.root_path, 'images')
-    if not os.path.exists(images_dir):
-        os.makedirs(images_dir)
 
-    file_path = os.path.join(images_dir, filename)
-    file.save(file_path)
+@app.route('/admin/images/upload/stream', methods=['POST'])
+@auth.login_required
+def upload_image_stream():
+    """Upload a new image sent as the raw request body, named by ?filename=."""
+    if request.content_length and request.content_length > MAX_FILE_SIZE:
+        return jsonify({'error': f'File too large. Max size: {MAX_FILE_SIZE / 1024 / 1024}MB'}), 413
 
-    # Add to database
-    new_image = Image(filename=filename, is_active=True)
-    db.session.add(new_image)
-    db.session.commit()
+    try:
+        new_image = save_uploaded_image(request.stream, request.args.get('filename', ''))
+    except UploadRejected as e:
+        return jsonify({'error': str(e)}), e.status
 
     return jsonify({
         'success': True,
@@ -355,6 +1084,43 @@ def upload_image():
     })
 
 
+@app.route('/admin/images/upload/bulk', methods=['POST'])
+@auth.login_required
+def upload_images_bulk():
+    """
+    Upload several images in one multipart request ('files' fields).
+
+    Responds with newline-delimited JSON: one line per file as it is
+    processed, then a summary line.
+    """
+    if request.content_length and request.content_length > MAX_BULK_UPLOAD_SIZE:
+        return jsonify({'error': f'Upload too large. Max size: {MAX_BULK_UPLOAD_SIZE / 1024 / 1024}MB'}), 413
+
+    files = request.files.getlist('files')
+    if not files:
+        return jsonify({'error': 'No files provided'}), 400
+
+    def generate():
+        uploaded = 0
+        for index, file in enumerate(files, start=1):
+            line = {'index': index, 'total': len(files), 'filename': file.filename}
+            try:
+                new_image = save_uploaded_image(file.stream, file.filename)
+                line.update(success=True, image=new_image.to_dict())
+                uploaded += 1
+            except UploadRejected as e:
+                line.update(success=False, error=str(e))
+            except Exception:
+                # A failure on one file (disk, database) still lets the rest and the summary through
+                db.session.rollback()
+                app.logger.exception('Bulk upload of %s failed', file.filename)
+                line.update(success=False, error='Upload failed')
+            yield json.dumps(line) + '\n'
+        yield json.dumps({'done': True, 'uploaded': uploaded, 'failed': len(files) - uploaded}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 @app.route('/admin/images/<int:image_id>/rename', methods=['POST'])
 @auth.login_required
 def rename_image(image_id):
@@ -391,10 +1157,14 @@ def rename_image(image_id):
         os.rename(old_path, new_path)
     except Exception as e:
         return jsonify({'error': f'Failed to rename file: {str(e)}'}), 500
+    image_variants.rename(old_filename, safe_name)
 
     # Update database
     image.filename = safe_name
     db.session.commit()
+    refresh_active_round()
+    group_tally.rename_image(image.id, safe_name)
+    smashpass_results_cache.clear()
 
     return jsonify({
         'success': True,
@@ -430,12 +1200,16 @@ def delete_image(image_id):
     try:
         if os.path.exists(file_path):
             os.remove(file_path)
+        image_variants.remove(image.filename)
     except Exception as e:
         return jsonify({'error': f'Failed to delete file: {str(e)}'}), 500
 
     # Delete from database
     db.session.delete(image)
     db.session.commit()
+    refresh_active_round()
+    group_tally.drop_image(image_id)
+    smashpass_results_cache.clear()
 
     return jsonify({'success': True})
 
@@ -473,6 +1247,7 @@ def create_poll():
             group_number += 1
 
     db.session.commit()
+    refresh_active_round()
 
     return jsonify({
         'poll': poll.to_dict(),
@@ -484,28 +1259,12 @@ def create_poll():
 @auth.login_required
 def get_current_poll():
     """Get the current active or most recent poll."""
-    poll = Poll.query.filter(Poll.status.in_(['setup', 'active'])).order_by(Poll.created_at.desc()).first()
+    state = poll_dashboard_state()
 
-    if not poll:
+    if not state:
         return jsonify({'error': 'No active poll'}), 404
 
-    # Get current group if poll is active
-    current_group_data = None
-    if poll.status == 'active' and poll.current_group is not None:
-        current_group = PollGroup.query.filter_by(
-            poll_id=poll.id,
-            group_number=poll.current_group
-        ).first()
-        if current_group:
-            current_group_data = current_group.to_dict()
-            # Add submission count
-            submission_count = Submission.query.filter_by(group_id=current_group.id).count()
-            current_group_data['submission_count'] = submission_count
-
-    return jsonify({
-        'poll': poll.to_dict(),
-        'current_group': current_group_data
-    })
+    return jsonify(state)
 
 
 @app.route('/admin/polls/all', methods=['GET'])
@@ -532,16 +1291,17 @@ def start_poll(poll_id):
         session.ended_at = datetime.utcnow()
     if active_sessions:
         db.session.commit()
-        socketio.emit('smashpass_completed', {}, room='smashpass')
+        emit_state('smashpass_completed', {})
 
     poll.status = 'active'
     poll.started_at = datetime.utcnow()
     poll.current_group = 0
     db.session.commit()
+    refresh_active_round()
 
-    # Notify all connected clients (including unified vote page)
-    socketio.emit('poll_started', {'poll_id': poll.id}, room='poll')
-    socketio.emit('vote_changed', {'type': 'mfk'})
+    # Notify voters (including the unified vote page) and dashboards
+    emit_state('poll_started', {'poll_id': poll.id})
+    emit_state('vote_changed', {'type': 'mfk'})
 
     return jsonify(poll.to_dict())
 
@@ -562,9 +1322,10 @@ def next_group(poll_id):
 
     poll.current_group += 1
     db.session.commit()
+    refresh_active_round()
 
     # Notify all connected clients
-    socketio.emit('group_changed', {'poll_id': poll.id, 'group_number': poll.current_group}, room='poll')
+    emit_state('group_changed', {'poll_id': poll.id, 'group_number': poll.current_group})
 
     return jsonify(poll.to_dict())
 
@@ -581,9 +1342,10 @@ def end_poll(poll_id):
     poll.status = 'ended'
     poll.ended_at = datetime.utcnow()
     db.session.commit()
+    refresh_active_round()
 
     # Notify all connected clients
-    socketio.emit('poll_ended', {'poll_id': poll.id}, room='poll')
+    emit_state('poll_ended', {'poll_id': poll.id})
 
     return jsonify(poll.to_dict())
 
@@ -622,16 +1384,34 @@ def get_poll_cumulative_results(poll_id):
     return jsonify(results)
 
 
+@app.route('/admin/votes/queue', methods=['GET'])
+@auth.login_required
+def get_vote_queue_metrics():
+    """Get write-behind queue depth, flush and batch size metrics."""
+    if not vote_queue:
+        return jsonify({'enabled': False})
+
+    return jsonify(dict(vote_queue.metrics(), enabled=True))
+
+
 @app.route('/admin/qr', methods=['GET'])
 @auth.login_required
 def generate_admin_qr():
     """Generate QR code for users to join the poll."""
     # Get the base URL from the request
-    base_url = request.host_url.rstrip('/')
-    poll_url = f"{base_url}/poll"
+    poll_url = qr_target_url('poll')
 
     qr_code = generate_qr_code(poll_url)
-    return jsonify({'qr_code': qr_code, 'url': poll_url})
+    return jsonify({'qr_code': qr_code, 'url': poll_url, 'image_url': '/qr/poll.png'})
+
+
+@app.route('/qr/<target>.png', methods=['GET'])
+def qr_image(target):
+    """Serve a join QR code as a cacheable PNG."""
+    if target not in QR_TARGETS:
+        return jsonify({'error': 'Unknown QR code'}), 404
+    png, etag = qr_codes.png(qr_target_url(target))
+    return send_bytes(png, 'image/png', etag, max_age=QR_MAX_AGE)
 
 
 # ============================================================================
@@ -648,97 +1428,32 @@ def poll_page():
 @app.route('/poll/current', methods=['GET'])
 def get_current_poll_for_user():
     """Get the current active poll and group for users."""
-    poll = Poll.query.filter_by(status='active').order_by(Poll.created_at.desc()).first()
+    mfk_round = active_round.current.mfk
 
-    if not poll:
+    if not mfk_round:
         return jsonify({'error': 'No active poll'}), 404
 
     # Get current group
-    current_group = PollGroup.query.filter_by(
-        poll_id=poll.id,
-        group_number=poll.current_group
-    ).first()
+    current_group = mfk_round['group']
 
     if not current_group:
         return jsonify({'error': 'No active group'}), 404
 
     # Check if user already submitted for this group
     user_id = get_or_create_user_id()
-    existing_submission = Submission.query.filter_by(
-        group_id=current_group.id,
-        user_id=user_id
-    ).first()
 
     return jsonify({
-        'poll_id': poll.id,
-        'group': current_group.to_dict(),
-        'has_submitted': existing_submission is not None
+        'poll_id': mfk_round['poll_id'],
+        'group': current_group,
+        'has_submitted': has_submitted(current_group['id'], user_id)
     })
 
 
 @app.route('/poll/submit', methods=['POST'])
 def submit_poll():
     """Submit a user's choices for the current poll group."""
-    data = request.json
-    user_id = get_or_create_user_id()
-
-    # Validate required fields
-    required_fields = ['poll_id', 'group_id', 'marry_image_id', 'f_image_id', 'kill_image_id']
-    if not all(field in data for field in required_fields):
-        return jsonify({'error': 'Missing required fields'}), 400
-
-    # Verify poll and group exist
-    poll = Poll.query.get(data['poll_id'])
-    group = PollGroup.query.get(data['group_id'])
-
-    if not poll or not group:
-        return jsonify({'error': 'Invalid poll or group'}), 404
-
-    if poll.status != 'active':
-        return jsonify({'error': 'Poll is not active'}), 400
-
-    # Verify all three image IDs are different
-    image_ids = [data['marry_image_id'], data['f_image_id'], data['kill_image_id']]
-    if len(set(image_ids)) != 3:
-        return jsonify({'error': 'Each image must be assigned to a different category'}), 400
-
-    # Verify all images belong to this group
-    group_image_ids = [group.image1_id, group.image2_id, group.image3_id]
-    if not all(img_id in group_image_ids for img_id in image_ids):
-        return jsonify({'error': 'Invalid image selection'}), 400
-
-    # Check if user already submitted for this group
-    existing = Submission.query.filter_by(group_id=group.id, user_id=user_id).first()
-    if existing:
-        # Update existing submission
-        existing.marry_image_id = data['marry_image_id']
-        existing.f_image_id = data['f_image_id']
-        existing.kill_image_id = data['kill_image_id']
-        existing.submitted_at = datetime.utcnow()
-    else:
-        # Create new submission
-        submission = Submission(
-            poll_id=data['poll_id'],
-            group_id=data['group_id'],
-            user_id=user_id,
-            marry_image_id=data['marry_image_id'],
-            f_image_id=data['f_image_id'],
-            kill_image_id=data['kill_image_id']
-        )
-        db.session.add(submission)
-
-    db.session.commit()
-
-    # Get updated results
-    results = get_group_results(group.id)
-
-    # Broadcast update to all clients in the poll room
-    socketio.emit('results_updated', results, room='poll')
-
-    return jsonify({
-        'success': True,
-        'results': results
-    })
+    result, status = record_mfk_submission(request.json or {}, get_or_create_user_id())
+    return jsonify(result), status
 
 
 @app.route('/poll/results/<int:group_id>', methods=['GET'])
@@ -782,6 +1497,8 @@ def get_slideshow_images():
 @auth.login_required
 def smashpass_admin():
     """Smash or Pass admin control page."""
+    # Lets this browser's socket join the dashboard room
+    session['dashboard'] = True
     return render_template('smashpass_admin.html')
 
 
@@ -796,7 +1513,7 @@ def create_smashpass_session():
         poll.ended_at = datetime.utcnow()
     if active_polls:
         db.session.commit()
-        socketio.emit('poll_ended', {}, room='poll')
+        emit_state('poll_ended', {})
 
     # Get all images
     all_images = Image.query.all()
@@ -817,10 +1534,12 @@ def create_smashpass_session():
     )
     db.session.add(session_obj)
     db.session.commit()
+    refresh_active_round()
+    sp_tally.start_session(session_obj.id)
 
-    # Notify all connected clients (including unified vote page)
-    socketio.emit('smashpass_started', {'session_id': session_obj.id}, room='smashpass')
-    socketio.emit('vote_changed', {'type': 'smashpass'})
+    # Notify voters (including the unified vote page) and dashboards
+    emit_state('smashpass_started', {'session_id': session_obj.id})
+    emit_state('vote_changed', {'type': 'smashpass'})
 
     return jsonify({
         'session': session_obj.to_dict(),
@@ -832,49 +1551,12 @@ def create_smashpass_session():
 @auth.login_required
 def get_current_smashpass_session():
     """Get the current active Smash or Pass session."""
-    session_obj = SmashPassSession.query.filter(
-        SmashPassSession.status.in_(['setup', 'active', 'completed'])
-    ).order_by(SmashPassSession.created_at.desc()).first()
+    state = smashpass_dashboard_state()
 
-    if not session_obj:
+    if not state:
         return jsonify({'error': 'No active session'}), 404
 
-    image_order = json.loads(session_obj.image_order)
-    current_image = None
-
-    if session_obj.status == 'active' and session_obj.current_image_index < len(image_order):
-        current_image_id = image_order[session_obj.current_image_index]
-        current_image_obj = Image.query.get(current_image_id)
-
-        if current_image_obj:
-            # Get vote counts for current image
-            smash_count = SmashPassVote.query.filter_by(
-                session_id=session_obj.id,
-                image_id=current_image_id,
-                vote='smash'
-            ).count()
-
-            pass_count = SmashPassVote.query.filter_by(
-                session_id=session_obj.id,
-                image_id=current_image_id,
-                vote='pass'
-            ).count()
-
-            current_image = {
-                'id': current_image_obj.id,
-                'filename': current_image_obj.filename,
-                'name': os.path.splitext(current_image_obj.filename)[0],
-                'smash_count': smash_count,
-                'pass_count': pass_count,
-                'total_votes': smash_count + pass_count
-            }
-
-    return jsonify({
-        'session': session_obj.to_dict(),
-        'current_image': current_image,
-        'total_images': len(image_order),
-        'images_remaining': len(image_order) - session_obj.current_image_index
-    })
+    return jsonify(state)
 
 
 @app.route('/smashpass/session/<int:session_id>/start', methods=['POST'])
@@ -889,9 +1571,10 @@ def start_smashpass_session(session_id):
     session_obj.status = 'active'
     session_obj.started_at = datetime.utcnow()
     db.session.commit()
+    refresh_active_round()
 
     # Notify all connected clients
-    socketio.emit('smashpass_started', {'session_id': session_obj.id}, room='smashpass')
+    emit_state('smashpass_started', {'session_id': session_obj.id})
 
     return jsonify(session_obj.to_dict())
 
@@ -911,18 +1594,12 @@ def next_smashpass_image(session_id):
     if session_obj.current_image_index < len(image_order):
         current_image_id = image_order[session_obj.current_image_index]
 
-        # Get vote counts
-        smash_count = SmashPassVote.query.filter_by(
-            session_id=session_obj.id,
-            image_id=current_image_id,
-            vote='smash'
-        ).count()
-
-        pass_count = SmashPassVote.query.filter_by(
-            session_id=session_obj.id,
-            image_id=current_image_id,
-            vote='pass'
-        ).count()
+        # Get vote counts; other workers' votes may not have been synced yet, so re-read them
+        if state_sync:
+            if vote_queue:
+                vote_queue.drain()
+            sp_tally.refresh(session_obj.id, current_image_id)
+        smash_count, pass_count = sp_tally.get(session_obj.id, current_image_id)
 
         # Update image active status: Smash = active, Pass = inactive
         current_image = Image.query.get(current_image_id)
@@ -940,9 +1617,10 @@ def next_smashpass_image(session_id):
         session_obj.status = 'completed'
         session_obj.ended_at = datetime.utcnow()
         db.session.commit()
+        refresh_active_round()
 
         # Notify clients
-        socketio.emit('smashpass_completed', {'session_id': session_obj.id}, room='smashpass')
+        emit_state('smashpass_completed', {'session_id': session_obj.id})
 
         return jsonify({
             'session': session_obj.to_dict(),
@@ -951,12 +1629,13 @@ def next_smashpass_image(session_id):
 
     session_obj.current_image_index += 1
     db.session.commit()
+    refresh_active_round()
 
     # Notify all connected clients
-    socketio.emit('smashpass_next_image', {
+    emit_state('smashpass_next_image', {
         'session_id': session_obj.id,
         'image_index': session_obj.current_image_index
-    }, room='smashpass')
+    })
 
     return jsonify(session_obj.to_dict())
 
@@ -973,9 +1652,10 @@ def end_smashpass_session(session_id):
     session_obj.status = 'completed'
     session_obj.ended_at = datetime.utcnow()
     db.session.commit()
+    refresh_active_round()
 
     # Notify all connected clients
-    socketio.emit('smashpass_completed', {'session_id': session_obj.id}, room='smashpass')
+    emit_state('smashpass_completed', {'session_id': session_obj.id})
 
     return jsonify(session_obj.to_dict())
 
@@ -993,32 +1673,42 @@ def get_all_smashpass_sessions():
 def get_smashpass_results(session_id):
     """Get results for the entire Smash or Pass session."""
     session_obj = SmashPassSession.query.get_or_404(session_id)
+
+    # Completed sessions can't receive votes, so their results never change
+    cached = smashpass_results_cache.get(session_obj.id)
+    if cached:
+        return jsonify(cached)
+
+    if vote_queue:
+        vote_queue.drain()
+
     image_order = json.loads(session_obj.image_order)
 
+    # Smash/pass counts and filenames for every voted image in one query.
+    # Images without votes are ties and are excluded anyway.
+    rows = db.session.query(
+        Image.id,
+        Image.filename,
+        func.sum(case((SmashPassVote.vote == 'smash', 1), else_=0)),
+        func.sum(case((SmashPassVote.vote == 'pass', 1), else_=0))
+    ).join(SmashPassVote, SmashPassVote.image_id == Image.id).filter(
+        SmashPassVote.session_id == session_obj.id
+    ).group_by(Image.id, Image.filename).all()
+    image_stats = {row[0]: row for row in rows}
+
     smashes = []
     passes = []
 
     for image_id in image_order:
-        image = Image.query.get(image_id)
-        if not image:
+        if image_id not in image_stats:
             continue
 
-        smash_count = SmashPassVote.query.filter_by(
-            session_id=session_obj.id,
-            image_id=image_id,
-            vote='smash'
-        ).count()
-
-        pass_count = SmashPassVote.query.filter_by(
-            session_id=session_obj.id,
-            image_id=image_id,
-            vote='pass'
-        ).count()
+        _, filename, smash_count, pass_count = image_stats[image_id]
 
         image_data = {
-            'id': image.id,
-            'filename': image.filename,
-            'name': os.path.splitext(image.filename)[0],
+            'id': image_id,
+            'filename': filename,
+            'name': os.path.splitext(filename)[0],
             'smash_count': smash_count,
             'pass_count': pass_count,
             'total_votes': smash_count + pass_count
@@ -1030,11 +1720,17 @@ def get_smashpass_results(session_id):
             passes.append(image_data)
         # Ties excluded from both lists
 
-    return jsonify({
+    results = {
         'session_id': session_obj.id,
         'smashes': smashes,
         'passes': passes
-    })
+    }
+
+    # Other workers may still be writing their queued votes, so only a single worker caches
+    if session_obj.status == 'completed' and not state_sync:
+        smashpass_results_cache[session_obj.id] = results
+
+    return jsonify(results)
 
 
 # ============================================================================
@@ -1051,126 +1747,42 @@ def smashpass_user_redirect():
 @app.route('/smashpass/current', methods=['GET'])
 def get_current_smashpass_for_user():
     """Get the current active Smash or Pass session and image for users."""
-    session_obj = SmashPassSession.query.filter_by(status='active').order_by(
-        SmashPassSession.created_at.desc()
-    ).first()
+    sp_round = active_round.current.smashpass
 
-    if not session_obj:
+    if not sp_round:
         return jsonify({'error': 'No active session'}), 404
 
-    image_order = json.loads(session_obj.image_order)
+    if sp_round['error']:
+        return jsonify({'error': sp_round['error']}), 404
 
-    if session_obj.current_image_index >= len(image_order):
-        return jsonify({'error': 'Session completed'}), 404
-
-    current_image_id = image_order[session_obj.current_image_index]
-    current_image = Image.query.get(current_image_id)
-
-    if not current_image:
-        return jsonify({'error': 'Image not found'}), 404
+    current_image = sp_round['image']
 
     # Check if user already voted for this image
     user_id = get_or_create_user_id()
-    existing_vote = SmashPassVote.query.filter_by(
-        session_id=session_obj.id,
-        image_id=current_image_id,
-        user_id=user_id
-    ).first()
+    existing_vote = find_smashpass_vote(sp_round['session_id'], current_image['id'], user_id)
 
     return jsonify({
-        'session_id': session_obj.id,
-        'image': {
-            'id': current_image.id,
-            'filename': current_image.filename,
-            'name': os.path.splitext(current_image.filename)[0]
-        },
+        'session_id': sp_round['session_id'],
+        'image': current_image,
         'has_voted': existing_vote is not None,
-        'vote': existing_vote.vote if existing_vote else None
+        'vote': existing_vote
     })
 
 
 @app.route('/smashpass/vote', methods=['POST'])
 def submit_smashpass_vote():
     """Submit a Smash or Pass vote."""
-    data = request.json
-    user_id = get_or_create_user_id()
-
-    # Validate required fields
-    if 'session_id' not in data or 'image_id' not in data or 'vote' not in data:
-        return jsonify({'error': 'Missing required fields'}), 400
-
-    if data['vote'] not in ['smash', 'pass']:
-        return jsonify({'error': 'Invalid vote. Must be "smash" or "pass"'}), 400
-
-    # Verify session exists and is active
-    session_obj = SmashPassSession.query.get(data['session_id'])
-    if not session_obj or session_obj.status != 'active':
-        return jsonify({'error': 'Invalid or inactive session'}), 400
-
-    # Verify image exists
-    image = Image.query.get(data['image_id'])
-    if not image:
-        return jsonify({'error': 'Image not found'}), 404
-
-    # Check if user already voted for this image
-    existing_vote = SmashPassVote.query.filter_by(
-        session_id=session_obj.id,
-        image_id=data['image_id'],
-        user_id=user_id
-    ).first()
-
-    if existing_vote:
-        # Update existing vote
-        existing_vote.vote = data['vote']
-        existing_vote.submitted_at = datetime.utcnow()
-    else:
-        # Create new vote
-        vote = SmashPassVote(
-            session_id=data['session_id'],
-            image_id=data['image_id'],
-            user_id=user_id,
-            vote=data['vote']
-        )
-        db.session.add(vote)
-
-    db.session.commit()
-
-    # Get updated counts
-    smash_count = SmashPassVote.query.filter_by(
-        session_id=session_obj.id,
-        image_id=data['image_id'],
-        vote='smash'
-    ).count()
-
-    pass_count = SmashPassVote.query.filter_by(
-        session_id=session_obj.id,
-        image_id=data['image_id'],
-        vote='pass'
-    ).count()
-
-    # Broadcast update to all clients
-    socketio.emit('smashpass_vote_update', {
-        'session_id': session_obj.id,
-        'image_id': data['image_id'],
-        'smash_count': smash_count,
-        'pass_count': pass_count
-    }, room='smashpass')
-
-    return jsonify({
-        'success': True,
-        'smash_count': smash_count,
-        'pass_count': pass_count
-    })
+    result, status = record_smashpass_vote(request.json or {}, get_or_create_user_id())
+    return jsonify(result), status
 
 
 @app.route('/smashpass/qr', methods=['GET'])
 def generate_smashpass_qr():
     """Generate QR code for users to join Smash or Pass."""
-    base_url = request.host_url.rstrip('/')
-    smashpass_url = f"{base_url}/"
+    smashpass_url = qr_target_url('smashpass')
 
     qr_code = generate_qr_code(smashpass_url)
-    return jsonify({'qr_code': qr_code, 'url': smashpass_url})
+    return jsonify({'qr_code': qr_code, 'url': smashpass_url, 'image_url': '/qr/smashpass.png'})
 
 
 # ============================================================================
@@ -1179,8 +1791,7 @@ def generate_smashpass_qr():
 
 @socketio.on('connect')
 def handle_connect():
-    """Handle client connection."""
-    join_room('poll')
+    """Handle client connection. Clients pick their room with join_role."""
     emit('connected', {'data': 'Connected to poll server'})
 
 
@@ -1190,20 +1801,94 @@ def handle_disconnect():
     pass
 
 
+@socketio.on('join_role')
+def handle_join_role(data=None):
+    """Join the room for a client role: voter or dashboard."""
+    role = (data or {}).get('role', 'voter')
+    room = ROLE_ROOMS.get(role)
+    if not room:
+        emit('role_error', {'error': f'Unknown role: {role}'})
+        return
+    # Dashboards must have loaded an admin page in this browser first
+    if role == 'dashboard' and not session.get('dashboard'):
+        emit('role_error', {'error': 'Admin login required for the dashboard role'})
+        return
+    join_room(room)
+    emit('joined_role', {'role': role})
+
+    # Dashboards start from a pushed snapshot rather than polling
+    if role == 'dashboard':
+        push_dashboard_state(to=request.sid)
+
+
 @socketio.on('join_poll')
 def handle_join_poll(data=None):
-    """Handle user joining a poll."""
-    join_room('poll')
+    """Handle user joining a poll (older clients; same as the voter role)."""
+    join_room(ROLE_ROOMS['voter'])
     emit('joined', {'data': 'Joined poll room'})
 
 
 @socketio.on('join_smashpass')
 def handle_join_smashpass(data=None):
-    """Handle user joining smash or pass."""
-    join_room('smashpass')
+    """Handle user joining smash or pass (older clients; same as the voter role)."""
+    join_room(ROLE_ROOMS['voter'])
     emit('joined_smashpass', {'data': 'Joined smash or pass room'})
 
 
+@socketio.on('results_subscribe')
+def handle_results_subscribe(data=None):
+    """
+    Subscribe to a live result stream ("group:<id>" or "smashpass:<session>:<image>").
+
+    Replies with a versioned snapshot; later changes arrive as results_delta
+    messages. Clients re-subscribe to resync after a version gap.
+    """
+    stream = (data or {}).get('stream')
+    snapshot = live_results.snapshot(stream)
+    if snapshot is None:
+        emit('results_error', {'stream': stream, 'error': 'Unknown results stream'})
+        return
+    join_room(stream)
+    emit('results_snapshot', snapshot)
+
+
+@socketio.on('results_unsubscribe')
+def handle_results_unsubscribe(data=None):
+    """Stop receiving deltas for a live result stream."""
+    stream = (data or {}).get('stream')
+    if stream:
+        leave_room(stream)
+
+
+def socket_vote(record, data):
+    """
+    Run a vote recorder for a socket event and return its result as the ack.
+
+    Votes are tied to the user_id in the page's session cookie. A socket
+    opened before the cookie was set has none, so the ack asks the client to
+    fall back to HTTP instead of voting under a second identity.
+    """
+    user_id = session.get('user_id')
+    if not user_id:
+        return {'error': 'No voter session', 'fallback': True}
+    result, status = record(data if isinstance(data, dict) else {}, user_id, transport='socket')
+    if status != 200:
+        result = dict(result, status=status)
+    return result
+
+
+@socketio.on('cast_smashpass_vote')
+def handle_cast_smashpass_vote(data=None):
+    """Socket twin of POST /smashpass/vote; the ack carries the new counts."""
+    return socket_vote(record_smashpass_vote, data)
+
+
+@socketio.on('submit_mfk')
+def handle_submit_mfk(data=None):
+    """Socket twin of POST /poll/submit; the ack carries the group's results."""
+    return socket_vote(record_mfk_submission, data)
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""
+Load and latency benchmarks for the FMK Quiz application.
+
+Runs named scenarios against a running server. Each scenario provisions the
+Smash or Pass session or MFK poll it needs through the admin API, so no
+manual setup is required. Results are p50/p95/p99 latency and throughput per
+operation, printed and optionally written as JSON that a later run can be
+compared against.
+
+The scenarios create sessions, polls and votes, so point this at a test
+server with its own data folder rather than one in use.
+
+Usage:
+    python benchmark.py                                # every scenario
+    python benchmark.py sp_vote_storm mfk_storm        # selected scenarios
+    python benchmark.py --output baseline.json         # save results
+    python benchmark.py --baseline baseline.json       # compare; exit 1 on regression
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import json
+import math
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+try:
+    import aiohttp
+    import socketio
+except ImportError as e:
+    print('Error: missing required package')
+    print('Please install: pip install aiohttp python-socketio')
+    print(f'Error details: {e}')
+    sys.exit(1)
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+class Recorder:
+    """Latency samples and errors per operation."""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.error_messages = []
+
+    def add(self, op, seconds):
+        self.samples.setdefault(op, []).append(seconds)
+
+    def error(self, op, message):
+        self.errors[op] = self.errors.get(op, 0) + 1
+        self.samples.setdefault(op, [])
+        if len(self.error_messages) < 10:
+            self.error_messages.append(f'{op}: {message}')
+
+    async def request(self, op, http, method, url, **kwargs):
+        """Time one HTTP request. Returns the decoded JSON body, or None on failure."""
+        start = time.perf_counter()
+        try:
+            async with http.request(method, url, **kwargs) as resp:
+                body = await resp.read()
+                elapsed = time.perf_counter() - start
+                if resp.status != 200:
+                    self.error(op, f'HTTP {resp.status} {body[:100]!r}')
+                    return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.error(op, repr(e))
+            return None
+        self.add(op, elapsed)
+        return json.loads(body) if body[:1] in (b'{', b'[') else {}
+
+
+def percentile(sorted_samples, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def summarize(recorder, wall_time):
+    """Per-operation statistics in milliseconds, plus successful operations per second."""
+    ops = {}
+    for op, samples in recorder.samples.items():
+        samples = sorted(samples)
+        stats = {
+            'count': len(samples),
+            'errors': recorder.errors.get(op, 0),
+            'throughput': round(len(samples) / wall_time, 1) if wall_time else 0
+        }
+        for name, value in (('p50', percentile(samples, 50)), ('p95', percentile(samples, 95)),
+                            ('p99', percentile(samples, 99)), ('max', samples[-1] if samples else None)):
+            stats[f'{name}_ms'] = round(value * 1000, 2) if value is not None else None
+        stats['mean_ms'] = round(sum(samples) / len(samples) * 1000, 2) if samples else None
+        ops[op] = stats
+    return ops
+
+
+# ============================================================================
+# SERVER ACCESS
+# ============================================================================
+
+class Server:
+    """Admin and voter access to the server under test."""
+
+    def __init__(self, url, password, concurrency):
+        self.url = url.rstrip('/')
+        self.password = password
+        self.connector = aiohttp.TCPConnector(limit=concurrency)
+        self.admin_http = None
+
+    async def __aenter__(self):
+        credentials = base64.b64encode(f'admin:{self.password}'.encode()).decode()
+        self.admin_http = self.session(headers={'Authorization': f'Basic {credentials}'})
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.admin_http.close()
+        await self.connector.close()
+
+    async def admin(self, method, path, **kwargs):
+        """Call an admin route; raises RuntimeError on an error status."""
+        async with self.admin_http.request(method, self.url + path, **kwargs) as resp:
+            if resp.status != 200:
+                raise RuntimeError(f'{method} {path} failed: HTTP {resp.status} {(await resp.text())[:200]}')
+            return await resp.json(content_type=None)
+
+    def session(self, **kwargs):
+        """An HTTP session on the shared connection pool with its own cookie jar."""
+        # unsafe=True keeps cookies set by IP-address hosts such as 127.0.0.1
+        return aiohttp.ClientSession(connector=self.connector, connector_owner=False,
+                                     cookie_jar=aiohttp.CookieJar(unsafe=True), **kwargs)
+
+    async def voters(self, count):
+        """HTTP sessions with their own voter cookie, as separate phones would have."""
+        async def new_voter():
+            http = self.session()
+            async with http.get(self.url + '/') as resp:
+                await resp.read()
+            return http
+        return await asyncio.gather(*(new_voter() for _ in range(count)))
+
+    async def socket_client(self, http, role='voter'):
+        """A Socket.IO client that has joined `role`, connected through `http` and sharing its cookies."""
+        client = socketio.AsyncClient(reconnection=False, http_session=http)
+        joined = asyncio.get_running_loop().create_future()
+        client.on('joined_role', lambda data: joined.done() or joined.set_result(True))
+        await client.connect(self.url, transports=['websocket'])
+        await client.emit('join_role', {'role': role})
+        await asyncio.wait_for(joined, 10)
+        return client
+
+    async def ensure_images(self, count):
+        """Upload generated placeholder images until at least `count` are active."""
+        images = await self.admin('GET', '/admin/images')
+        missing = count - sum(1 for image in images if image['is_active'])
+        if missing <= 0:
+            return
+        from PIL import Image as PILImage
+        for n in range(missing):
+            buffered = io.BytesIO()
+            PILImage.new('RGB', (800, 600), ((n * 67) % 256, (n * 131) % 256, (n * 199) % 256)).save(buffered, 'PNG')
+            name = f'benchmark-{int(time.time())}-{n}.png'
+            await self.admin('POST', f'/admin/images/upload/stream?filename={name}', data=buffered.getvalue())
+
+    async def start_smashpass(self):
+        """Start a new Smash or Pass session. Returns the voter view of its first image."""
+        await self.ensure_images(3)
+        await self.admin('POST', '/smashpass/session/create')
+        return await self.current_vote()
+
+    async def start_mfk(self):
+        """Create and start an MFK poll. Returns the voter view of its first group."""
+        await self.ensure_images(3)
+        poll = (await self.admin('POST', '/admin/poll/create'))['poll']
+        await self.admin('POST', f'/admin/poll/{poll["id"]}/start')
+        return await self.current_vote()
+
+    async def current_vote(self):
+        async with self.admin_http.get(self.url + '/vote/current') as resp:
+            return await resp.json(content_type=None)
+
+
+def smashpass_choice(user, n):
+    """Deterministic votes, two smashes to every pass so images stay active for MFK polls."""
+    return 'pass' if (user + n) % 3 == 0 else 'smash'
+
+
+async def close_all(sessions=(), clients=()):
+    await asyncio.gather(*(client.disconnect() for client in clients), return_exceptions=True)
+    await asyncio.gather(*(http.close() for http in sessions), return_exceptions=True)
+
+
+# ============================================================================
+# SCENARIOS
+# ============================================================================
+
+async def sp_vote_storm(server, opts, rec):
+    """Every user casts --votes Smash or Pass votes over HTTP, all at once."""
+    current = await server.start_smashpass()
+    voters = await server.voters(opts.users)
+
+    async def vote(user, http):
+        for n in range(opts.votes):
+            data = {'session_id': current['session_id'], 'image_id': current['image']['id'],
+                    'vote': smashpass_choice(user, n)}
+            await rec.request('smashpass_vote', http, 'POST', server.url + '/smashpass/vote', json=data)
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(vote(user, http) for user, http in enumerate(voters)))
+        return time.perf_counter() - start
+    finally:
+        await close_all(voters)
+
+
+async def sp_socket_vote_storm(server, opts, rec):
+    """Same as sp_vote_storm, with votes sent as cast_smashpass_vote socket events."""
+    current = await server.start_smashpass()
+    voters = await server.voters(opts.users)
+    clients = []
+
+    async def vote(user, client):
+        for n in range(opts.votes):
+            data = {'session_id': current['session_id'], 'image_id': current['image']['id'],
+                    'vote': smashpass_choice(user, n)}
+            start = time.perf_counter()
+            try:
+                ack = await client.call('cast_smashpass_vote', data, timeout=10)
+            except socketio.exceptions.TimeoutError:
+                rec.error('cast_smashpass_vote', 'no ack')
+                continue
+            if ack.get('success'):
+                rec.add('cast_smashpass_vote', time.perf_counter() - start)
+            else:
+                rec.error('cast_smashpass_vote', ack.get('error'))
+
+    try:
+        clients = await asyncio.gather(*(server.socket_client(http) for http in voters))
+        start = time.perf_counter()
+        await asyncio.gather(*(vote(user, client) for user, client in enumerate(clients)))
+        return time.perf_counter() - start
+    finally:
+        await close_all(voters, clients)
+
+
+async def mfk_storm(server, opts, rec):
+    """Every user submits --votes MFK choices for the current group, all at once."""
+    current = await server.start_mfk()
+    group = current['group']
+    image_ids = [image['id'] for image in group['images']]
+    voters = await server.voters(opts.users)
+
+    async def submit(user, http):
+        for n in range(opts.votes):
+            shift = (user + n) % 3
+            marry, f, kill = image_ids[shift:] + image_ids[:shift]
+            data = {'poll_id': current['poll_id'], 'group_id': group['id'],
+                    'marry_image_id': marry, 'f_image_id': f, 'kill_image_id': kill}
+            await rec.request('mfk_submit', http, 'POST', server.url + '/poll/submit', json=data)
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(submit(user, http) for user, http in enumerate(voters)))
+        return time.perf_counter() - start
+    finally:
+        await close_all(voters)
+
+
+async def mixed_read_write(server, opts, rec):
+    """For --duration seconds, --readers users poll round state while the rest vote."""
+    current = await server.start_smashpass()
+    readers = min(opts.readers, opts.users)
+    voters = await server.voters(opts.users)
+    deadline = time.perf_counter() + opts.duration
+    image_path = f'/images/thumb/{current["image"]["filename"]}'
+
+    async def read(http):
+        while time.perf_counter() < deadline:
+            await rec.request('vote_current', http, 'GET', server.url + '/vote/current')
+            await rec.request('vote_prefetch', http, 'GET', server.url + '/vote/prefetch')
+            await rec.request('image_thumb', http, 'GET', server.url + image_path)
+
+    async def write(user, http):
+        n = 0
+        while time.perf_counter() < deadline:
+            data = {'session_id': current['session_id'], 'image_id': current['image']['id'],
+                    'vote': smashpass_choice(user, n)}
+            await rec.request('smashpass_vote', http, 'POST', server.url + '/smashpass/vote', json=data)
+            n += 1
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(read(http) for http in voters[:readers]),
+                             *(write(user, http) for user, http in enumerate(voters[readers:])))
+        return time.perf_counter() - start
+    finally:
+        await close_all(voters)
+
+
+async def round_transitions(server, opts, rec):
+    """Users fetch the current image and vote in a loop while the admin moves on every --round-interval."""
+    current = await server.start_smashpass()
+    session_id = current['session_id']
+    voters = await server.voters(opts.users)
+    deadline = time.perf_counter() + opts.duration
+
+    async def vote(user, http):
+        n = 0
+        while time.perf_counter() < deadline:
+            state = await rec.request('vote_current', http, 'GET', server.url + '/vote/current')
+            if not state or state.get('type') != 'smashpass':
+                await asyncio.sleep(0.05)
+                continue
+            data = {'session_id': state['session_id'], 'image_id': state['image']['id'],
+                    'vote': smashpass_choice(user, n)}
+            await rec.request('smashpass_vote', http, 'POST', server.url + '/smashpass/vote', json=data)
+            n += 1
+
+    async def advance():
+        nonlocal session_id
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(opts.round_interval)
+            result = await rec.request('next_image', server.admin_http, 'POST',
+                                       f'{server.url}/smashpass/session/{session_id}/next')
+            if result and result.get('completed'):
+                session_id = (await server.start_smashpass())['session_id']
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(advance(), *(vote(user, http) for user, http in enumerate(voters)))
+        return time.perf_counter() - start
+    finally:
+        await close_all(voters)
+
+
+async def broadcast_fanout(server, opts, rec):
+    """
+    --listeners voter sockets subscribed to the image's result stream;
+    measures how long round changes and live result deltas take to reach
+    every one of them.
+    """
+    current = await server.start_smashpass()
+    stream = f'smashpass:{current["session_id"]}:{current["image"]["id"]}'
+    listener_sessions = [server.session() for _ in range(opts.listeners)]
+    clients = []
+    loop = asyncio.get_running_loop()
+    sent_at = {}
+    received = {'round_change_fanout': [], 'results_delta_fanout': []}
+
+    def on_receive(op):
+        def handler(data):
+            # Ignore broadcasts that were not triggered by a measurement
+            if op in sent_at:
+                received[op].append(time.perf_counter() - sent_at[op])
+        return handler
+
+    def listen(client):
+        snapshot = loop.create_future()
+        client.on('results_snapshot', lambda data: snapshot.done() or snapshot.set_result(data))
+        client.on('smashpass_next_image', on_receive('round_change_fanout'))
+        client.on('results_delta', on_receive('results_delta_fanout'))
+        return snapshot
+
+    async def measure(op, trigger, rounds):
+        for _ in range(rounds):
+            received[op].clear()
+            sent_at[op] = time.perf_counter()
+            await trigger()
+            # Wait until every listener got it, or give up after 5 seconds
+            give_up = time.perf_counter() + 5
+            while len(received[op]) < len(clients) and time.perf_counter() < give_up:
+                await asyncio.sleep(0.005)
+            for latency in received[op][:len(clients)]:
+                rec.add(op, latency)
+            for _ in range(len(clients) - len(received[op])):
+                rec.error(op, 'not received within 5s')
+
+    voters = await server.voters(opts.rounds)
+    try:
+        clients = await asyncio.gather(*(server.socket_client(http, role='voter') for http in listener_sessions))
+
+        # Live result deltas: one vote from a new user per round, spaced past the broadcast interval
+        snapshots = [listen(client) for client in clients]
+        await asyncio.gather(*(client.emit('results_subscribe', {'stream': stream}) for client in clients))
+        await asyncio.wait_for(asyncio.gather(*snapshots), 10)
+        voter_iter = iter(voters)
+
+        async def cast_vote():
+            data = {'session_id': current['session_id'], 'image_id': current['image']['id'], 'vote': 'smash'}
+            await rec.request('smashpass_vote', next(voter_iter), 'POST', server.url + '/smashpass/vote', json=data)
+
+        start = time.perf_counter()
+        await measure('results_delta_fanout', cast_vote, opts.rounds)
+
+        # Round changes, sent to the voters and dashboard rooms
+        async def next_image():
+            await rec.request('next_image', server.admin_http, 'POST',
+                              f'{server.url}/smashpass/session/{current["session_id"]}/next')
+
+        await measure('round_change_fanout', next_image, opts.rounds)
+        return time.perf_counter() - start
+    finally:
+        await close_all(voters + listener_sessions, clients)
+
+
+SCENARIOS = {
+    'sp_vote_storm': sp_vote_storm,
+    'sp_socket_vote_storm': sp_socket_vote_storm,
+    'mfk_storm': mfk_storm,
+    'mixed_read_write': mixed_read_write,
+    'round_transitions': round_transitions,
+    'broadcast_fanout': broadcast_fanout
+}
+
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def print_scenario(name, result):
+    print(f'{name}  ({result["wall_s"]:.2f}s)')
+    print(f'  {"operation":<24}{"count":>8}{"errors":>8}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"ops/s":>10}')
+    for op, stats in result['ops'].items():
+        row = [stats[key] if stats[key] is not None else '-' for key in ('p50_ms', 'p95_ms', 'p99_ms')]
+        print(f'  {op:<24}{stats["count"]:>8}{stats["errors"]:>8}'
+              f'{row[0]:>10}{row[1]:>10}{row[2]:>10}{stats["throughput"]:>10}')
+    for message in result.get('error_samples', []):
+        print(f'    ! {message}')
+    print()
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare each operation's p95 latency, throughput and error count with a
+    baseline run. Scenarios that failed, and baseline operations this run did
+    not record, count as regressions. Returns a list of regression descriptions.
+    """
+    regressions = []
+    scenarios = results['scenarios']
+    # Baseline scenarios left out of this run on purpose are not compared
+    selected = results['meta'].get('scenarios', list(scenarios))
+    for name, result in scenarios.items():
+        if result.get('failed'):
+            regressions.append(f'{name}: failed - {result["failed"]}')
+    for name, base_result in baseline.get('scenarios', {}).items():
+        if name not in selected or scenarios.get(name, {}).get('failed'):
+            continue
+        if name not in scenarios:
+            regressions.append(f'{name}: missing from this run')
+            continue
+        ops = scenarios[name]['ops']
+        for op, base in base_result.get('ops', {}).items():
+            label = f'{name}/{op}'
+            stats = ops.get(op)
+            if not stats:
+                regressions.append(f'{label}: missing from this run')
+                continue
+            # Ignore sub-millisecond wobble on very fast operations
+            if stats['p95_ms'] and base['p95_ms'] and stats['p95_ms'] > base['p95_ms'] * (1 + threshold) \
+                    and stats['p95_ms'] - base['p95_ms'] > 1:
+                regressions.append(f'{label}: p95 {base["p95_ms"]}ms -> {stats["p95_ms"]}ms')
+            if base['throughput'] and stats['throughput'] < base['throughput'] * (1 - threshold):
+                regressions.append(f'{label}: throughput {base["throughput"]}/s -> {stats["throughput"]}/s')
+            if stats['errors'] > base['errors']:
+                regressions.append(f'{label}: errors {base["errors"]} -> {stats["errors"]}')
+    return regressions
+
+
+async def run(opts):
+    results = {
+        'meta': {
+            'url': opts.url,
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'scenarios': opts.scenarios,
+            'options': {key: getattr(opts, key) for key in
+                        ('users', 'votes', 'readers', 'duration', 'round_interval', 'listeners', 'rounds')}
+        },
+        'scenarios': {}
+    }
+    async with Server(opts.url, opts.password, opts.concurrency) as server:
+        for name in opts.scenarios:
+            rec = Recorder()
+            try:
+                wall_time = await SCENARIOS[name](server, opts, rec)
+            except Exception as e:
+                print(f'{name}: failed - {e!r}\n')
+                results['scenarios'][name] = {'failed': repr(e), 'wall_s': 0, 'ops': {}}
+                continue
+            result = {'wall_s': round(wall_time, 3), 'ops': summarize(rec, wall_time)}
+            if rec.error_messages:
+                result['error_samples'] = rec.error_messages
+            results['scenarios'][name] = result
+            print_scenario(name, result)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Load and latency benchmarks for the FMK Quiz server.')
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help=f'scenarios to run (default: all): {", ".join(SCENARIOS)}')
+    parser.add_argument('--url', default='http://localhost:5000', help='server to test')
+    parser.add_argument('--password', default=os.environ.get('ADMIN_PASSWORD', 'admin123'),
+                        help='admin password (default: $ADMIN_PASSWORD or admin123)')
+    parser.add_argument('--users', type=int, default=100, help='simulated voters')
+    parser.add_argument('--votes', type=int, default=5, help='votes per user in the storm scenarios')
+    parser.add_argument('--readers', type=int, default=50, help='users that only read in mixed_read_write')
+    parser.add_argument('--duration', type=float, default=10, help='seconds the timed scenarios run')
+    parser.add_argument('--round-interval', type=float, default=1, help='seconds between rounds in round_transitions')
+    parser.add_argument('--listeners', type=int, default=200, help='voter sockets in broadcast_fanout')
+    parser.add_argument('--rounds', type=int, default=10, help='measured broadcasts per kind in broadcast_fanout')
+    parser.add_argument('--concurrency', type=int, default=200, help='max open HTTP connections')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='compare with a JSON file from an earlier --output')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed p95 / throughput change before a regression is reported (default 0.2)')
+    opts = parser.parse_args(argv)
+
+    unknown = [name for name in opts.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f'unknown scenario(s): {", ".join(unknown)}')
+    opts.scenarios = opts.scenarios or list(SCENARIOS)
+    return opts
+
+
+def main(argv=None):
+    opts = parse_args(argv)
+    print()
+    print('=' * 70)
+    print('FMK QUIZ - BENCHMARKS')
+    print('=' * 70)
+    print(f'Server:     {opts.url}')
+    print(f'Scenarios:  {", ".join(opts.scenarios)}')
+    print()
+
+    results = asyncio.run(run(opts))
+
+    if opts.output:
+        with open(opts.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Results written to {opts.output}')
+
+    if opts.baseline:
+        with open(opts.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, opts.threshold)
+        if regressions:
+            print(f'REGRESSIONS against {opts.baseline}:')
+            for regression in regressions:
+                print(f'  - {regression}')
+            return 1
+        print(f'No regressions against {opts.baseline} (threshold {opts.threshold:.0%})')
+    return 0
+
+
+if __name__ == '__main__':
+    if sys.platform == 'win32':
+        # Windows specific event loop policy
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print('\n\nBenchmark interrupted by user')
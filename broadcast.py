@@ -0,0 +1,69 @@
+"""
+Coalesced Socket.IO broadcasts for live results.
+
+Vote routes mark a result as dirty instead of emitting it. A background task
+emits each dirty result at most once per tick with the latest totals, so the
+number of outbound messages follows the tick rate rather than the vote rate.
+
+Messages go only to this worker's clients, never through the Socket.IO
+message queue: with several workers, each one sends its own subscribers the
+deltas it computed, so a client never mixes versions from two workers.
+"""
+import threading
+
+
+class BroadcastCoalescer:
+    """Emits at most one message per (event, room) per tick."""
+
+    def __init__(self, app, socketio, interval=0.15, on_emit=None):
+        self.app = app
+        self.socketio = socketio
+        self.interval = interval
+        # Called with the event name after each emit, e.g. to count them
+        self.on_emit = on_emit
+
+        # (event, room) -> callable returning the payload
+        self._dirty = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        """Start the background emit loop (no-op when coalescing is disabled)."""
+        if self._started or self.interval <= 0:
+            return
+        self._started = True
+        self.socketio.start_background_task(self._run)
+
+    def mark_dirty(self, event, room, payload):
+        """
+        Schedule `event` for `room`. `payload` is a callable that builds the
+        message when it is actually sent, so the latest totals go out.
+        """
+        if self.interval <= 0:
+            self._emit(event, room, payload)
+            return
+        with self._lock:
+            self._dirty[(event, room)] = payload
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        """Emit everything marked dirty since the last tick."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return
+        with self.app.app_context():
+            for (event, room), payload in dirty.items():
+                self._emit(event, room, payload)
+
+    def _emit(self, event, room, payload):
+        data = payload()
+        if data is None:
+            return
+        self.socketio.emit(event, data, room=room, ignore_queue=True)
+        if self.on_emit:
+            self.on_emit(event)
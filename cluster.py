@@ -0,0 +1,41 @@
+"""
+Multi-worker support for the FMK Quiz application.
+
+With SOCKETIO_MESSAGE_QUEUE set, Socket.IO events are relayed between worker
+processes through a message queue (Redis, Kafka, ZeroMQ or any Kombu URL),
+and each worker periodically picks up admin changes and votes made by the
+others from the database.
+"""
+
+
+def socketio_queue_options(url, channel):
+    """SocketIO() keyword arguments for a message queue URL, or {} for a single worker."""
+    if not url:
+        return {}
+    return {'message_queue': url, 'channel': channel}
+
+
+class StateSync:
+    """Runs `sync` in an app context every `interval` seconds in the background."""
+
+    def __init__(self, app, socketio_server, interval, sync):
+        self.app = app
+        self.socketio = socketio_server
+        self.interval = interval
+        self.sync = sync
+        self._started = False
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        self.socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.interval)
+            with self.app.app_context():
+                try:
+                    self.sync()
+                except Exception:
+                    self.app.logger.exception('Shared state sync failed')
@@ -1,12 +1,17 @@
 """
 Database models and initialization for the FMK Quiz application.
 """
+import os
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from sqlalchemy import func
+from sqlalchemy import event, func, inspect
 
 db = SQLAlchemy()
 
+SQLITE_JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+SQLITE_SYNCHRONOUS_LEVELS = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+
 class Image(db.Model):
     """Stores information about available images."""
     __tablename__ = 'images'
@@ -54,6 +59,9 @@ class Poll(db.Model):
 class PollGroup(db.Model):
     """Represents a group of 3 images shown together in a poll."""
     __tablename__ = 'poll_groups'
+    __table_args__ = (
+        db.Index('uq_poll_groups_poll_group_number', 'poll_id', 'group_number', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     poll_id = db.Column(db.Integer, db.ForeignKey('polls.id'), nullable=False)
@@ -90,6 +98,10 @@ class PollGroup(db.Model):
 class Submission(db.Model):
     """Stores user submissions for a poll group."""
     __tablename__ = 'submissions'
+    __table_args__ = (
+        db.Index('uq_submissions_group_user', 'group_id', 'user_id', unique=True),
+        db.Index('ix_submissions_poll', 'poll_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     poll_id = db.Column(db.Integer, db.ForeignKey('polls.id'), nullable=False)
@@ -149,6 +161,10 @@ class SmashPassSession(db.Model):
 class SmashPassVote(db.Model):
     """Stores individual Smash or Pass votes."""
     __tablename__ = 'smashpass_votes'
+    __table_args__ = (
+        db.Index('uq_smashpass_votes_session_image_user', 'session_id', 'image_id', 'user_id', unique=True),
+        db.Index('ix_smashpass_votes_session_image_vote', 'session_id', 'image_id', 'vote'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.Integer, db.ForeignKey('smashpass_sessions.id'), nullable=False)
@@ -171,11 +187,189 @@ class SmashPassVote(db.Model):
         }
 
 
+class StateVersion(db.Model):
+    """Counter bumped on shared state changes so other workers know to reload."""
+    __tablename__ = 'state_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+def _insert(model):
+    """Dialect-specific INSERT that supports ON CONFLICT DO UPDATE."""
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
+def upsert_smashpass_votes(rows):
+    """
+    Insert or update Smash or Pass votes with a single statement.
+
+    Rows are keyed on (session_id, image_id, user_id); an existing vote is
+    replaced along with its submitted_at time. Call db.session.commit() after.
+    """
+    stmt = _insert(SmashPassVote)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['session_id', 'image_id', 'user_id'],
+        set_={'vote': stmt.excluded.vote, 'submitted_at': stmt.excluded.submitted_at}
+    )
+    db.session.execute(stmt, rows)
+
+
+def upsert_submissions(rows):
+    """
+    Insert or update MFK submissions with a single statement.
+
+    Rows are keyed on (group_id, user_id); an existing submission gets the new
+    marry/f/kill choices and submitted_at time. Call db.session.commit() after.
+    """
+    stmt = _insert(Submission)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['group_id', 'user_id'],
+        set_={
+            'marry_image_id': stmt.excluded.marry_image_id,
+            'f_image_id': stmt.excluded.f_image_id,
+            'kill_image_id': stmt.excluded.kill_image_id,
+            'submitted_at': stmt.excluded.submitted_at
+        }
+    )
+    db.session.execute(stmt, rows)
+
+
+def bump_state_version(name):
+    """Increment a shared state counter. Call db.session.commit() after."""
+    stmt = _insert(StateVersion).values(name=name, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'version': StateVersion.version + 1}
+    )
+    db.session.execute(stmt)
+
+
+def get_state_version(name):
+    """Return the current value of a shared state counter (0 if never bumped)."""
+    version = db.session.query(StateVersion.version).filter_by(name=name).scalar()
+    return version or 0
+
+
+def sqlite_settings_from_env():
+    """Read SQLite pragma and connection pool settings from the environment."""
+    journal_mode = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL').upper()
+    synchronous = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+    if journal_mode not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f'Invalid SQLITE_JOURNAL_MODE: {journal_mode}')
+    if synchronous not in SQLITE_SYNCHRONOUS_LEVELS:
+        raise ValueError(f'Invalid SQLITE_SYNCHRONOUS: {synchronous}')
+
+    return {
+        'journal_mode': journal_mode,
+        'synchronous': synchronous,
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -20000)),  # negative = KiB, so ~20MB
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'pool_size': int(os.environ.get('SQLITE_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('SQLITE_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('SQLITE_POOL_TIMEOUT', 30))
+    }
+
+
+def configure_sqlite(app, settings):
+    """Set SQLAlchemy engine options for a file-backed SQLite database."""
+    engine_options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    engine_options.setdefault('pool_size', settings['pool_size'])
+    engine_options.setdefault('max_overflow', settings['max_overflow'])
+    engine_options.setdefault('pool_timeout', settings['pool_timeout'])
+    connect_args = engine_options.setdefault('connect_args', {})
+    # Connections are shared by eventlet green threads and returned to the pool
+    connect_args.setdefault('check_same_thread', False)
+    connect_args.setdefault('timeout', settings['busy_timeout'] / 1000)
+
+
+def _apply_sqlite_pragmas(settings):
+    """Build an engine connect listener that applies the pragmas to every new connection."""
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings['journal_mode']}")
+        cursor.execute(f"PRAGMA synchronous={settings['synchronous']}")
+        cursor.execute(f"PRAGMA busy_timeout={settings['busy_timeout']:d}")
+        cursor.execute(f"PRAGMA cache_size={settings['cache_size']:d}")
+        cursor.execute(f"PRAGMA mmap_size={settings['mmap_size']:d}")
+        cursor.close()
+    return on_connect
+
+
+def sqlite_report():
+    """Return the effective SQLite pragmas and pool settings of the current engine, or None for other databases."""
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return None
+    engine_options = current_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    report = {
+        'database': engine.url.database,
+        'pool': type(engine.pool).__name__,
+        'pool_size': engine_options.get('pool_size'),
+        'max_overflow': engine_options.get('max_overflow'),
+        'pool_timeout': engine_options.get('pool_timeout')
+    }
+    with engine.connect() as connection:
+        for pragma in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size'):
+            report[pragma] = connection.exec_driver_sql(f'PRAGMA {pragma}').scalar()
+    # synchronous is reported as a number
+    report['synchronous'] = ['OFF', 'NORMAL', 'FULL', 'EXTRA'][report['synchronous']]
+    return report
+
+
+# Tables whose duplicate rows may be dropped before adding a unique index.
+# The newest row (highest id) is kept, matching how the vote routes update in place.
+DEDUPLICATE_ON_MIGRATE = {'submissions', 'smashpass_votes'}
+
+
+def migrate_db():
+    """Add indexes and unique constraints missing from databases created by older versions."""
+    inspector = inspect(db.engine)
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+
+                if index.unique:
+                    columns = ', '.join(column.name for column in index.columns)
+                    duplicate = connection.exec_driver_sql(
+                        f'SELECT 1 FROM {table.name} GROUP BY {columns} HAVING COUNT(*) > 1 LIMIT 1'
+                    ).first()
+                    if duplicate and table.name not in DEDUPLICATE_ON_MIGRATE:
+                        print(f'Skipping index {index.name}: {table.name} has duplicate ({columns}) rows')
+                        continue
+                    if duplicate:
+                        removed = connection.exec_driver_sql(
+                            f'DELETE FROM {table.name} WHERE id NOT IN '
+                            f'(SELECT MAX(id) FROM {table.name} GROUP BY {columns})'
+                        ).rowcount
+                        print(f'Removed {removed} duplicate rows from {table.name} before adding {index.name}')
+
+                index.create(connection)
+                print(f'Created index {index.name} on {table.name}')
+
+
 def init_db(app):
     """Initialize the database with the Flask app."""
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    is_sqlite = uri.startswith('sqlite:///') and ':memory:' not in uri
+    if is_sqlite:
+        settings = sqlite_settings_from_env()
+        configure_sqlite(app, settings)
+
     db.init_app(app)
     with app.app_context():
+        if is_sqlite:
+            event.listen(db.engine, 'connect', _apply_sqlite_pragmas(settings))
         db.create_all()
+        migrate_db()
         # Scan images folder and add any new images
         import os
         images_dir = os.path.join(app.root_path, 'images')
@@ -0,0 +1,186 @@
+"""
+Cache-friendly file responses for the FMK Quiz application.
+
+Files are served with strong ETags from a hash of their contents. URLs that
+carry the current hash as ?v=<hash> are cached as immutable; anything else
+must revalidate, which costs a 304 instead of the whole file. Static JS and
+CSS are gzip (and, with the brotli package installed, brotli) compressed once
+at startup and served precompressed to browsers that accept it.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import tempfile
+import threading
+from flask import Response, abort, request, send_file
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip copies are built without it
+    brotli = None
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Extensions worth compressing; images are already compressed
+COMPRESSIBLE_EXTENSIONS = {'.js', '.css', '.html', '.svg', '.json', '.txt'}
+
+# Content-Encoding -> (file suffix, compress function), in order of preference
+ENCODINGS = {
+    'br': ('.br', lambda data: brotli.compress(data, quality=11)),
+    'gzip': ('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))
+}
+
+
+class FileHashes:
+    """Content hashes of files, recomputed only when a file's size or mtime changes."""
+
+    def __init__(self, length=12):
+        self.length = length
+        # path -> (mtime_ns, size, hash)
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return the hash of a file, or None if it does not exist."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        cached = self._hashes.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        file_hash = digest.hexdigest()[:self.length]
+
+        with self._lock:
+            self._hashes[path] = (stat.st_mtime_ns, stat.st_size, file_hash)
+        return file_hash
+
+
+class Precompressor:
+    """Keeps compressed copies of static files under `output_dir`."""
+
+    def __init__(self, source_dir, output_dir):
+        self.source_dir = source_dir
+        self.output_dir = output_dir
+
+    def encodings(self):
+        """Content-Encodings that copies are built for."""
+        return [name for name in ENCODINGS if name != 'br' or brotli is not None]
+
+    def path(self, relative_path, encoding):
+        return os.path.join(self.output_dir, relative_path + ENCODINGS[encoding][0])
+
+    def build(self):
+        """Compress every compressible file that changed since its copies were built. Returns the count."""
+        built = 0
+        for root, _, files in os.walk(self.source_dir):
+            for name in files:
+                if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                    continue
+                source = os.path.join(root, name)
+                relative_path = os.path.relpath(source, self.source_dir)
+                source_mtime = os.path.getmtime(source)
+
+                data = None
+                for encoding in self.encodings():
+                    target = self.path(relative_path, encoding)
+                    if os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+                        continue
+                    if data is None:
+                        with open(source, 'rb') as f:
+                            data = f.read()
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    # Unique temporary name: several workers may build into a shared data/ at startup
+                    with tempfile.NamedTemporaryFile(dir=os.path.dirname(target), suffix='.tmp', delete=False) as f:
+                        f.write(ENCODINGS[encoding][1](data))
+                    os.replace(f.name, target)
+                    built += 1
+        return built
+
+    def choose(self, relative_path, source_mtime):
+        """Return (encoding, path) of the best copy the client accepts, or (None, None)."""
+        accepted = request.accept_encodings
+        for encoding in self.encodings():
+            if not accepted[encoding]:
+                continue
+            path = self.path(relative_path, encoding)
+            try:
+                if os.path.getmtime(path) >= source_mtime:
+                    return encoding, path
+            except OSError:
+                continue
+        return None, None
+
+
+def send_cached_file(directory, filename, hashes, version=None, precompressed=None, vary=()):
+    """
+    Send a file with a strong content-hash ETag and conditional-GET support.
+
+    `version` is the ?v= value from the URL; when it matches the file's (or
+    the original's, for derived files) current hash the response is cached
+    as immutable. `precompressed` is a Precompressor for `directory`.
+    """
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    return send_hashed_path(path, hashes, version=version, precompressed=precompressed,
+                            relative_path=filename, vary=vary)
+
+
+def send_hashed_path(path, hashes, version=None, expected_version=None, precompressed=None,
+                     relative_path=None, vary=()):
+    """
+    Send a file by path with a content-hash ETag.
+
+    `expected_version` is the hash a ?v= value must match for the response
+    to be immutable; it defaults to the hash of the file itself.
+    """
+    file_hash = hashes.get(path)
+    if file_hash is None:
+        abort(404)
+
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    send_path, encoding = path, None
+    if precompressed is not None:
+        encoding, compressed_path = precompressed.choose(relative_path, os.path.getmtime(path))
+        if encoding:
+            send_path = compressed_path
+
+    # Each encoding is a different representation, so it gets its own strong ETag
+    etag = f'{file_hash}-{encoding}' if encoding else file_hash
+    response = send_file(send_path, mimetype=mimetype, etag=etag, conditional=True)
+
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if precompressed is not None:
+        response.vary.add('Accept-Encoding')
+    for header in vary:
+        response.vary.add(header)
+
+    if version and version == (expected_version or file_hash):
+        # send_file marks responses no-cache by default
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        # Unversioned or outdated URL: cache, but check the ETag on every use
+        response.cache_control.no_cache = True
+    return response
+
+
+def send_bytes(data, mimetype, etag, max_age=0):
+    """Send an in-memory body with a strong ETag, answering matching conditional GETs with 304."""
+    response = Response(data, mimetype=mimetype)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
@@ -0,0 +1,102 @@
+"""
+Resized image variants for the FMK Quiz application.
+
+Each uploaded image gets size-bucketed copies (thumb, mobile, display) in WebP
+and JPEG, built at upload time, or in the background after startup when missing. Phones download the
+variant that fits their screen instead of the original upload.
+"""
+import os
+import tempfile
+from PIL import Image as PILImage, ImageOps
+
+# Variant name -> longest side in pixels
+VARIANTS = {
+    'thumb': 240,
+    'mobile': 720,
+    'display': 1600
+}
+
+# Output format -> (file extension, PIL save options)
+FORMATS = {
+    'webp': ('webp', {'format': 'WEBP', 'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True})
+}
+
+
+class ImageVariants:
+    """Builds and locates resized copies of the images in `images_dir`."""
+
+    def __init__(self, images_dir, variants_dir):
+        self.images_dir = images_dir
+        self.variants_dir = variants_dir
+
+    def path(self, filename, variant, fmt):
+        """Location of one variant of an image."""
+        extension = FORMATS[fmt][0]
+        return os.path.join(self.variants_dir, variant, f'{filename}.{extension}')
+
+    def _paths(self, filename):
+        for variant in VARIANTS:
+            for fmt in FORMATS:
+                yield self.path(filename, variant, fmt)
+
+    def is_current(self, filename):
+        """True if every variant exists and is newer than the original."""
+        source = os.path.join(self.images_dir, filename)
+        try:
+            source_mtime = os.path.getmtime(source)
+        except OSError:
+            return False
+        for path in self._paths(filename):
+            if not os.path.exists(path) or os.path.getmtime(path) < source_mtime:
+                return False
+        return True
+
+    def build(self, filename):
+        """Write every variant of an image, replacing any older ones."""
+        source = os.path.join(self.images_dir, filename)
+        with PILImage.open(source) as original:
+            # Animated GIFs become a still of their first frame
+            original.seek(0)
+            image = ImageOps.exif_transpose(original)
+
+            has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+
+            for variant, max_side in VARIANTS.items():
+                resized = image.copy()
+                resized.thumbnail((max_side, max_side), PILImage.LANCZOS)
+
+                for fmt, (_, options) in FORMATS.items():
+                    output = resized
+                    if fmt == 'jpeg' and has_alpha:
+                        # JPEG has no alpha channel: flatten onto white
+                        output = PILImage.new('RGB', resized.size, (255, 255, 255))
+                        output.paste(resized, mask=resized.getchannel('A'))
+
+                    path = self.path(filename, variant, fmt)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    # Write under a unique temporary name so readers never see a partial
+                    # file and workers sharing the folder don't write over each other
+                    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.tmp', delete=False) as f:
+                        try:
+                            output.save(f, **options)
+                        except BaseException:
+                            f.close()
+                            os.remove(f.name)
+                            raise
+                    os.replace(f.name, path)
+
+    def rename(self, old_filename, new_filename):
+        """Move an image's variants to its new filename."""
+        for variant in VARIANTS:
+            for fmt in FORMATS:
+                old_path = self.path(old_filename, variant, fmt)
+                if os.path.exists(old_path):
+                    os.replace(old_path, self.path(new_filename, variant, fmt))
+
+    def remove(self, filename):
+        """Delete an image's variants."""
+        for path in self._paths(filename):
+            if os.path.exists(path):
+                os.remove(path)
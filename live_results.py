@@ -0,0 +1,115 @@
+"""
+Delta-encoded live result streams for Socket.IO clients.
+
+A stream is the live tally of one MFK group ("group:<group_id>") or one Smash
+or Pass image ("smashpass:<session_id>:<image_id>"). Subscribers receive a
+versioned snapshot, then only the counters that changed, each message
+carrying the next version number. A client that sees a gap in versions
+re-subscribes to get a fresh snapshot. Only the `max_streams` most recently
+used streams are tracked; a stream dropped from the list starts again at
+version 1 on its next subscribe.
+"""
+import threading
+from collections import OrderedDict
+
+
+class LiveResults:
+    """Tracks the last state sent on each stream and builds snapshots and deltas."""
+
+    def __init__(self, sources, max_streams=256):
+        # kind -> callable(*ids) returning {'counts': {image_id: {counter: n}}, 'total': n, ...extra}
+        # or None if the subject does not exist or cannot be subscribed to
+        self._sources = sources
+        self.max_streams = max_streams
+        # stream -> {'version': n, 'counts': {...}, 'total': n}, least recently used first
+        self._sent = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _read(self, stream):
+        """Read the current tally for a stream from its source, or None for an unknown stream."""
+        try:
+            kind, *ids = str(stream).split(':')
+            source = self._sources[kind]
+            ids = [int(value) for value in ids]
+        except (KeyError, ValueError):
+            return None
+        try:
+            return source(*ids)
+        except TypeError:
+            return None
+
+    def snapshot(self, stream):
+        """Return the full state of a stream as last sent, or None for an unknown stream."""
+        current = self._read(stream)
+        if current is None:
+            return None
+
+        with self._lock:
+            sent = self._sent.get(stream)
+            if sent is None:
+                # First subscriber: start the stream from the current tally
+                sent = self._sent[stream] = {
+                    'version': 1,
+                    'counts': _copy_counts(current['counts']),
+                    'total': current['total']
+                }
+                while len(self._sent) > self.max_streams:
+                    self._sent.popitem(last=False)
+            else:
+                self._sent.move_to_end(stream)
+
+            snapshot = dict(current)
+            snapshot.update(
+                stream=stream,
+                version=sent['version'],
+                counts=_copy_counts(sent['counts']),
+                total=sent['total']
+            )
+            return snapshot
+
+    def delta(self, stream):
+        """
+        Return the counters that changed since the last message on a stream
+        and advance its version, or None if nothing changed or nobody has
+        subscribed yet.
+        """
+        with self._lock:
+            sent = self._sent.get(stream)
+            if sent is not None:
+                self._sent.move_to_end(stream)
+        if sent is None:
+            return None
+
+        current = self._read(stream)
+        if current is None:
+            return None
+
+        with self._lock:
+            changes = {}
+            for image_id, counts in current['counts'].items():
+                previous = sent['counts'].get(image_id, {})
+                changed = {
+                    counter: value - previous.get(counter, 0)
+                    for counter, value in counts.items()
+                    if value != previous.get(counter, 0)
+                }
+                if changed:
+                    changes[image_id] = changed
+
+            total = current['total'] - sent['total']
+            if not changes and not total:
+                return None
+
+            sent['version'] += 1
+            sent['counts'] = _copy_counts(current['counts'])
+            sent['total'] = current['total']
+            return {
+                'stream': stream,
+                'version': sent['version'],
+                'total': total,
+                'counts': changes
+            }
+
+
+def _copy_counts(counts):
+    return {image_id: dict(values) for image_id, values in counts.items()}
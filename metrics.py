@@ -0,0 +1,146 @@
+"""
+In-process metrics for the FMK Quiz application, in Prometheus text format.
+
+A small registry of counters, gauges and histograms. Recording a value is a
+dictionary update, cheap enough for the vote path. Gauges and counters can
+also be backed by a function that is only called when /metrics is scraped,
+for values other components already keep (room sizes, emit counts, queue
+depth). Each worker process has its own registry.
+"""
+import bisect
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow admin pages
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=(), func=None):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        # func() -> {label_values_tuple: value}, read at scrape time
+        self.func = func
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        values = self.func() if self.func else self._values
+        for label_values, value in list(values.items()):
+            yield self.name, _format_labels(self.labels, label_values), value
+
+
+class Gauge(Counter):
+    """A value that can go up and down."""
+
+    kind = 'gauge'
+
+    def set(self, value, *label_values):
+        self._values[label_values] = value
+
+
+class Histogram:
+    """Counts of observations per bucket, with their sum, per label combination."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label_values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(label_values, [[0] * (len(self.buckets) + 1), 0.0, 0])
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self):
+        bucket_labels = self.labels + ('le',)
+        for label_values, (counts, total, count) in list(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield (f'{self.name}_bucket',
+                       _format_labels(bucket_labels, label_values + (_format_value(bound),)), cumulative)
+            labels = _format_labels(self.labels, label_values)
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, count
+
+
+class Registry:
+    """The metrics of one process, rendered together by /metrics."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=(), func=None):
+        return self._add(Counter(name, help_text, labels, func))
+
+    def gauge(self, name, help_text, labels=(), func=None):
+        return self._add(Gauge(name, help_text, labels, func))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def observe_commits(histogram):
+    """Record how long every ORM session commit (flush included) takes."""
+    def before_commit(session):
+        session.info['commit_started'] = time.perf_counter()
+
+    def after_commit(session):
+        started = session.info.pop('commit_started', None)
+        if started is not None:
+            histogram.observe(time.perf_counter() - started)
+
+    event.listen(Session, 'before_commit', before_commit)
+    event.listen(Session, 'after_commit', after_commit)
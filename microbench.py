@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+In-process endpoint microbenchmarks for the FMK Quiz application.
+
+Seeds a temporary SQLite database with a configurable number of images,
+sessions, polls, users and votes, then times the hot routes and socket events
+through Flask's and Flask-SocketIO's test clients. Each route reports its
+latency and the number of SQL statements it executed, so an N+1 query shows
+up as a statement count that grows with the data. No server needs to run.
+
+Every data size runs in a fresh process, so module-level caches and counters
+never carry over between sizes.
+
+Usage:
+    python microbench.py                               # votes = 1k, 10k, 100k
+    python microbench.py --votes 1000,50000 --iterations 100
+    python microbench.py --output microbench.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+# ============================================================================
+# SEEDING
+# ============================================================================
+
+def seed(fmk, opts, votes):
+    """Fill the app's (empty) database. Returns the ids the routes are called with."""
+    from sqlalchemy import insert
+    from database import db, Image, Poll, PollGroup, Submission, SmashPassSession, SmashPassVote
+
+    rng = random.Random(opts.seed)
+    now = datetime.utcnow()
+    users = [f'bench-user-{n}' for n in range(opts.users)]
+
+    db.session.execute(insert(Image), [
+        {'filename': f'bench-{n:05d}.png', 'is_active': True} for n in range(opts.images)
+    ])
+    image_ids = [image.id for image in Image.query.filter(Image.filename.like('bench-%')).order_by(Image.id)]
+
+    # Smash or Pass: completed sessions plus one active session on its first image
+    for n in range(opts.sessions):
+        order = image_ids[:]
+        rng.shuffle(order)
+        active = n == opts.sessions - 1
+        db.session.add(SmashPassSession(
+            status='active' if active else 'completed',
+            image_order=json.dumps(order),
+            current_image_index=0 if active else len(order) - 1,
+            started_at=now - timedelta(hours=opts.sessions - n),
+            ended_at=None if active else now - timedelta(hours=opts.sessions - n - 1)
+        ))
+    db.session.flush()
+    sessions = SmashPassSession.query.order_by(SmashPassSession.id).all()
+
+    capacity = len(sessions) * len(image_ids) * len(users)
+    if votes > capacity:
+        raise SystemExit(f'--votes {votes} is more than sessions x images x users ({capacity})')
+    vote_rows = []
+    for n in range(votes):
+        slot = n // len(sessions)
+        vote_rows.append({
+            'session_id': sessions[n % len(sessions)].id,
+            'image_id': image_ids[slot % len(image_ids)],
+            'user_id': users[(slot // len(image_ids)) % len(users)],
+            'vote': 'smash' if rng.random() < 0.6 else 'pass',
+            'submitted_at': now
+        })
+    db.session.execute(insert(SmashPassVote), vote_rows)
+
+    # MFK: ended polls plus one active poll, each with a group per three images
+    groups = []
+    for n in range(opts.polls):
+        active = n == opts.polls - 1
+        poll = Poll(status='active' if active else 'ended', current_group=0,
+                    started_at=now, ended_at=None if active else now)
+        db.session.add(poll)
+        db.session.flush()
+        shuffled = image_ids[:]
+        rng.shuffle(shuffled)
+        for number in range(len(shuffled) // 3):
+            group = PollGroup(poll_id=poll.id, group_number=number, image1_id=shuffled[number * 3],
+                              image2_id=shuffled[number * 3 + 1], image3_id=shuffled[number * 3 + 2])
+            db.session.add(group)
+            groups.append(group)
+    db.session.flush()
+
+    submissions = votes if opts.submissions is None else opts.submissions
+    capacity = len(groups) * len(users)
+    if submissions > capacity:
+        raise SystemExit(f'{submissions} submissions is more than groups x users ({capacity})')
+    submission_rows = []
+    for n in range(submissions):
+        group = groups[n % len(groups)]
+        choice = [group.image1_id, group.image2_id, group.image3_id]
+        rng.shuffle(choice)
+        submission_rows.append({
+            'poll_id': group.poll_id,
+            'group_id': group.id,
+            'user_id': users[(n // len(groups)) % len(users)],
+            'marry_image_id': choice[0],
+            'f_image_id': choice[1],
+            'kill_image_id': choice[2],
+            'submitted_at': now
+        })
+    db.session.execute(insert(Submission), submission_rows)
+    db.session.commit()
+
+    # The app built its in-memory state from the empty database at import
+    fmk.sp_tally.warm()
+    fmk.active_round.rebuild()
+
+    active_session = sessions[-1]
+    active_poll = Poll.query.filter_by(status='active').one()
+    active_group = PollGroup.query.filter_by(poll_id=active_poll.id, group_number=0).one()
+    return {
+        'session_id': active_session.id,
+        'image_id': json.loads(active_session.image_order)[0],
+        'completed_session_id': sessions[0].id,
+        'poll_id': active_poll.id,
+        'group_id': active_group.id,
+        'group_images': [active_group.image1_id, active_group.image2_id, active_group.image3_id]
+    }
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+class StatementCounter:
+    """Counts SQL statements sent through an engine."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def percentile(sorted_samples, p):
+    return sorted_samples[min(len(sorted_samples) - 1, int(round(p / 100 * (len(sorted_samples) - 1))))]
+
+
+def measure(call, counter, iterations):
+    """
+    Time a call once cold and then `iterations` times warm.
+
+    `call` returns True on success. The cold call is reported separately
+    because several routes cache their first result.
+    """
+    def timed():
+        counter.count = 0
+        start = time.perf_counter()
+        ok = call()
+        return time.perf_counter() - start, counter.count, ok
+
+    cold_time, cold_statements, ok = timed()
+    if not ok:
+        return {'error': 'request failed'}
+
+    times, statements = [], []
+    for _ in range(iterations):
+        elapsed, count, ok = timed()
+        if not ok:
+            return {'error': 'request failed'}
+        times.append(elapsed)
+        statements.append(count)
+    times.sort()
+    return {
+        'cold_ms': round(cold_time * 1000, 3),
+        'cold_statements': cold_statements,
+        'p50_ms': round(percentile(times, 50) * 1000, 3),
+        'p95_ms': round(percentile(times, 95) * 1000, 3),
+        'statements': statistics.median(statements)
+    }
+
+
+def cases(fmk, ids, admin_headers):
+    """(name, call) for every benchmarked route and socket event."""
+    app, socketio = fmk.app, fmk.socketio
+    voter = app.test_client()
+    voter.get('/')
+    admin = app.test_client()
+    sock = socketio.test_client(app, flask_test_client=voter)
+    sock.emit('join_role', {'role': 'voter'})
+
+    flip = {'n': 0}
+
+    def next_vote():
+        flip['n'] += 1
+        return {'session_id': ids['session_id'], 'image_id': ids['image_id'],
+                'vote': 'smash' if flip['n'] % 2 else 'pass'}
+
+    def next_mfk():
+        flip['n'] += 1
+        shift = flip['n'] % 3
+        marry, f, kill = ids['group_images'][shift:] + ids['group_images'][:shift]
+        return {'poll_id': ids['poll_id'], 'group_id': ids['group_id'],
+                'marry_image_id': marry, 'f_image_id': f, 'kill_image_id': kill}
+
+    def get(client, path, headers=None):
+        return lambda: client.get(path, headers=headers).status_code == 200
+
+    def ack(event, data_func):
+        return lambda: sock.emit(event, data_func(), callback=True).get('success', False)
+
+    def subscribe(stream):
+        # The pinned Flask-SocketIO test client does not hand server emits back,
+        # so the snapshot is checked once here and the calls time the handler only
+        with app.app_context():
+            valid = fmk.live_results.snapshot(stream) is not None
+
+        def call():
+            sock.emit('results_subscribe', {'stream': stream})
+            return valid
+        return call
+
+    return [
+        ('GET /vote/current', get(voter, '/vote/current')),
+        ('GET /vote/prefetch', get(voter, '/vote/prefetch')),
+        ('GET /smashpass/current', get(voter, '/smashpass/current')),
+        ('POST /smashpass/vote', lambda: voter.post('/smashpass/vote', json=next_vote()).status_code == 200),
+        ('socket cast_smashpass_vote', ack('cast_smashpass_vote', next_vote)),
+        ('GET /smashpass/session/current', get(admin, '/smashpass/session/current', admin_headers)),
+        ('GET /smashpass/session/<active>/results',
+         get(admin, f'/smashpass/session/{ids["session_id"]}/results', admin_headers)),
+        ('GET /smashpass/session/<completed>/results',
+         get(admin, f'/smashpass/session/{ids["completed_session_id"]}/results', admin_headers)),
+        ('GET /smashpass/sessions/all', get(admin, '/smashpass/sessions/all', admin_headers)),
+        ('GET /poll/current', get(voter, '/poll/current')),
+        ('POST /poll/submit', lambda: voter.post('/poll/submit', json=next_mfk()).status_code == 200),
+        ('socket submit_mfk', ack('submit_mfk', next_mfk)),
+        ('GET /poll/results/<group>', get(voter, f'/poll/results/{ids["group_id"]}')),
+        ('GET /admin/poll/current', get(admin, '/admin/poll/current', admin_headers)),
+        ('GET /admin/poll/<id>/results/current',
+         get(admin, f'/admin/poll/{ids["poll_id"]}/results/current', admin_headers)),
+        ('GET /admin/poll/<id>/results/cumulative',
+         get(admin, f'/admin/poll/{ids["poll_id"]}/results/cumulative', admin_headers)),
+        ('GET /admin/polls/all', get(admin, '/admin/polls/all', admin_headers)),
+        ('socket results_subscribe group', subscribe(f'group:{ids["group_id"]}')),
+        ('socket results_subscribe smashpass', subscribe(f'smashpass:{ids["session_id"]}:{ids["image_id"]}')),
+    ]
+
+
+def run_size(opts, votes):
+    """Benchmark one data size in this process; returns {route: stats}."""
+    data_dir = tempfile.mkdtemp(prefix='fmk-microbench-')
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(data_dir, "bench.db")}'
+    try:
+        # Startup messages would mix with the JSON on stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            import app as fmk
+            from database import db
+            import base64
+
+            with fmk.app.app_context():
+                started = time.perf_counter()
+                ids = seed(fmk, opts, votes)
+                print(f'Seeded {votes} votes in {time.perf_counter() - started:.1f}s', file=sys.stderr)
+                counter = StatementCounter(db.engine)
+
+            credentials = base64.b64encode(f'admin:{fmk.ADMIN_PASSWORD}'.encode()).decode()
+            results = {}
+            for name, call in cases(fmk, ids, {'Authorization': f'Basic {credentials}'}):
+                results[name] = measure(call, counter, opts.iterations)
+        return results
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def print_report(sizes, results):
+    routes = list(next(iter(results.values())))
+    header = ''.join(f'{f"{size} votes":>24}' for size in sizes)
+    print(f'{"":<44}{header}')
+    print(f'{"route":<44}' + f'{"p50 ms   sql  cold sql":>24}' * len(sizes))
+    for route in routes:
+        row = ''
+        for size in sizes:
+            stats = results[str(size)][route]
+            if 'error' in stats:
+                row += f'{stats["error"]:>24}'
+            else:
+                row += f'{stats["p50_ms"]:>10.2f}{stats["statements"]:>6g}{stats["cold_statements"]:>8}'
+        print(f'{route:<44}{row}')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='In-process endpoint microbenchmarks for the FMK Quiz app.')
+    parser.add_argument('--votes', default='1000,10000,100000',
+                        help='comma-separated Smash or Pass vote counts to seed, one run each')
+    parser.add_argument('--submissions', type=int,
+                        help='MFK submissions to seed (default: same as votes)')
+    parser.add_argument('--images', type=int, default=60, help='images to seed')
+    parser.add_argument('--sessions', type=int, default=10, help='Smash or Pass sessions (the last is active)')
+    parser.add_argument('--polls', type=int, default=5, help='MFK polls (the last is active)')
+    parser.add_argument('--users', type=int, default=2000, help='distinct voters')
+    parser.add_argument('--iterations', type=int, default=50, help='warm calls per route')
+    parser.add_argument('--seed', type=int, default=1, help='random seed for the generated data')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    opts = parse_args(argv)
+
+    if opts.child is not None:
+        json.dump(run_size(opts, opts.child), sys.stdout)
+        return 0
+
+    sizes = [int(size) for size in opts.votes.split(',')]
+    forwarded = []
+    for key in ('submissions', 'images', 'sessions', 'polls', 'users', 'iterations', 'seed'):
+        if getattr(opts, key) is not None:
+            forwarded += [f'--{key}', str(getattr(opts, key))]
+
+    results = {}
+    for size in sizes:
+        print(f'Running with {size} votes...', file=sys.stderr)
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), *forwarded, '--child', str(size)],
+                               stdout=subprocess.PIPE, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if child.returncode != 0:
+            print(f'Run with {size} votes failed', file=sys.stderr)
+            return child.returncode
+        results[str(size)] = json.loads(child.stdout)
+
+    print()
+    print_report(sizes, results)
+
+    if opts.output:
+        with open(opts.output, 'w') as f:
+            json.dump({'options': {key: value for key, value in vars(opts).items() if key not in ('child', 'output')},
+                       'results': results}, f, indent=2)
+        print(f'\nResults written to {opts.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
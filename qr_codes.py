@@ -0,0 +1,47 @@
+"""
+QR code rendering for the FMK Quiz application.
+
+Join links only change with the host they are served from, so each rendered
+PNG is kept in a small LRU cache keyed by URL and render options. Projector
+screens reloading the QR endpoints then cost a dictionary lookup instead of a
+QR matrix build and PNG encode.
+"""
+import base64
+import functools
+import hashlib
+from io import BytesIO
+import qrcode
+
+
+class QRCodes:
+    """LRU cache of rendered QR code PNGs."""
+
+    def __init__(self, maxsize=32, box_size=10, border=1):
+        self.box_size = box_size
+        self.border = border
+        self._render = functools.lru_cache(maxsize=maxsize)(self._build)
+
+    @staticmethod
+    def _build(url, box_size, border):
+        qr = qrcode.QRCode(version=1, box_size=box_size, border=border)
+        qr.add_data(url)
+        qr.make(fit=True)
+        img = qr.make_image(fill_color="black", back_color="white")
+
+        buffered = BytesIO()
+        img.save(buffered, format="PNG")
+        png = buffered.getvalue()
+        return png, hashlib.sha256(png).hexdigest()[:16]
+
+    def png(self, url):
+        """Return (png_bytes, etag) for a URL."""
+        return self._render(url, self.box_size, self.border)
+
+    def data_url(self, url):
+        """Return the QR code for a URL as a base64 data: URL."""
+        png, _ = self.png(url)
+        return f"data:image/png;base64,{base64.b64encode(png).decode()}"
+
+    def cache_info(self):
+        """Hits, misses and current size of the render cache, exported on /metrics."""
+        return self._render.cache_info()
@@ -0,0 +1,104 @@
+"""
+Per-request SQL profiling for the FMK Quiz application.
+
+Opt-in (SQL_PROFILE=1) because it adds work to every statement. While
+enabled, each HTTP request records how many statements it ran, how long they
+took in total, and how often each statement shape repeated. The totals are
+sent back in a Server-Timing header, so browser dev tools show them next to
+the request. Slow requests are logged with their most frequent statements,
+and a request that runs the same shape more than `repeat_threshold` times
+(a lazy load or a get() inside a loop) is logged as a likely N+1 query.
+"""
+import re
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# Literals that differ between otherwise identical statements
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*(?:\?|:\w+|%\(\w+\)s|\$\d+)(?:\s*,\s*(?:\?|:\w+|%\(\w+\)s|\$\d+))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(statement):
+    """The shape of a statement: literals and IN lists collapsed, whitespace normalized."""
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _IN_LIST.sub('(...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class RequestProfile:
+    """SQL statements run while handling one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.db_time += duration
+        self.shapes[fingerprint(statement)] += 1
+
+    def repeated(self, threshold):
+        """Statement shapes run more than `threshold` times, most frequent first."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+class SQLProfiler:
+    """Attaches per-request SQL profiling to a Flask app and its engine."""
+
+    def __init__(self, slow_ms=200, repeat_threshold=10, top=5):
+        self.slow = slow_ms / 1000
+        self.repeat_threshold = repeat_threshold
+        # Statement shapes listed in the slow-request log
+        self.top = top
+
+    def init_app(self, app, engine):
+        self.app = app
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    @staticmethod
+    def _current():
+        # Statements from background workers (vote queue, broadcasts) have no request
+        if not has_request_context():
+            return None
+        return g.get('sql_profile')
+
+    # The start time lives on the statement's execution context, so a statement
+    # that fails (and never reaches after_cursor_execute) leaves nothing behind
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._sql_profile_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_sql_profile_started', None)
+        profile = self._current()
+        if profile is not None and started is not None:
+            profile.record(statement, time.perf_counter() - started)
+
+    def _start_request(self):
+        g.sql_profile = RequestProfile()
+
+    def _finish_request(self, response):
+        profile = g.pop('sql_profile', None)
+        if profile is None:
+            return response
+        elapsed = time.perf_counter() - profile.started
+        response.headers.add('Server-Timing', f'db;dur={profile.db_time * 1000:.2f};desc="{profile.count} queries"')
+        response.headers.add('Server-Timing', f'app;dur={elapsed * 1000:.2f}')
+
+        label = f'{request.method} {request.full_path.rstrip("?")}'
+        for shape, count in profile.repeated(self.repeat_threshold):
+            self.app.logger.warning('Possible N+1 query in %s: %d runs of %s', label, count, shape)
+        if elapsed >= self.slow:
+            top = '\n'.join(f'  {count:>5}x  {shape}' for shape, count in profile.shapes.most_common(self.top))
+            self.app.logger.warning('Slow request: %s took %.1fms, %d queries in %.1fms\n%s',
+                                    label, elapsed * 1000, profile.count, profile.db_time * 1000, top)
+        return response
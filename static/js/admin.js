@@ -13,7 +13,7 @@ function showNotificationCenter(message, type = 'info') {
 // Initialize admin panel
 document.addEventListener('DOMContentLoaded', () => {
     // Initialize socket
-    initializeSocket();
+    initializeSocket('dashboard');
 
     // Setup tab switching
     setupTabs();
@@ -39,8 +39,10 @@ document.addEventListener('DOMContentLoaded', () => {
     // Check for existing poll
     checkCurrentPoll();
 
-    // Auto-refresh only active content
+    // Updates are pushed over the socket; poll only while it is disconnected
     setInterval(() => {
+        if (liveUpdatesActive()) return;
+
         const pollTab = document.getElementById('poll-tab');
 
         // Only refresh live results on poll tab if poll is active
@@ -110,7 +112,7 @@ function displayImages(images) {
         const card = document.createElement('div');
         card.className = 'image-card';
         card.innerHTML = `
-            <img src="/images/${image.filename}" alt="${image.filename}">
+            <img src="${imageUrl(image, 'thumb')}" alt="${image.filename}">
             <div class="image-overlay">
                 <span class="filename" title="${image.filename}">${image.filename}</span>
                 <button class="toggle-btn ${image.is_active ? 'active' : 'inactive'}"
@@ -256,11 +258,11 @@ async function loadQRCode() {
         const qrUrl = document.getElementById('qr-url');
 
         if (qrImageMain) {
-            qrImageMain.src = result.qr_code;
+            qrImageMain.src = result.image_url;
             qrUrlMain.textContent = result.url;
         }
         if (qrImage) {
-            qrImage.src = result.qr_code;
+            qrImage.src = result.image_url;
             qrUrl.textContent = result.url;
         }
     } catch (error) {
@@ -337,18 +339,24 @@ async function checkCurrentPoll() {
             return;
         }
         const result = await response.json();
-        currentPoll = result.poll;
-        currentPollId = result.poll.id;
-        updatePollStatus();
-        updateButtonStates();
-        if (result.current_group) {
-            displayCurrentGroup(result.current_group);
-        }
+        applyPollState(result);
     } catch (error) {
         // No active poll, which is fine
     }
 }
 
+// Apply poll state from /admin/poll/current or a pushed dashboard_state
+function applyPollState(result) {
+    if (!result) return;
+    currentPoll = result.poll;
+    currentPollId = result.poll.id;
+    updatePollStatus();
+    updateButtonStates();
+    if (result.current_group) {
+        displayCurrentGroup(result.current_group);
+    }
+}
+
 // Update poll status display
 function updatePollStatus() {
     const statusInfo = document.getElementById('status-info');
@@ -408,6 +416,33 @@ async function loadCurrentGroup() {
     }
 }
 
+// Live result stream the dashboard is following
+let liveGroupStream = null;
+
+// Follow the live result stream of a group; deltas re-render the results in place
+function followGroupResults(groupId) {
+    const streamName = `group:${groupId}`;
+    if (liveGroupStream === streamName) return;
+    if (liveGroupStream) unsubscribeResults(liveGroupStream);
+    liveGroupStream = streamName;
+
+    subscribeResults(streamName, (state) => {
+        const submissionsDiv = document.getElementById('group-submissions');
+        if (currentPoll) {
+            submissionsDiv.textContent = `Group ${currentPoll.current_group + 1} / ${currentPoll.total_groups} - Submissions: ${state.total}`;
+        } else {
+            submissionsDiv.textContent = `Submissions: ${state.total}`;
+        }
+
+        displayLiveResults({
+            results: state.images.map(img => ({
+                filename: img.filename,
+                ...state.counts[img.image_id]
+            }))
+        });
+    });
+}
+
 // Display current group with live results
 async function displayCurrentGroup(groupData) {
 
@@ -424,6 +459,24 @@ async function displayCurrentGroup(groupData) {
         submissionsDiv.textContent = `Submissions: ${groupData.submission_count || 0}`;
     }
 
+    // Live results come from the group's result stream while the socket is up
+    if (liveUpdatesActive()) {
+        const stream = resultStreams[`group:${groupData.id}`];
+        if (!stream || !stream.state) {
+            // Show the images at 0 until the stream snapshot arrives
+            displayLiveResults({
+                results: groupData.images.map(img => ({
+                    filename: img.filename,
+                    marry: 0,
+                    f: 0,
+                    kill: 0
+                }))
+            });
+        }
+        followGroupResults(groupData.id);
+        return;
+    }
+
     // Get live results for current group
     try {
         const results = await apiCall(`/admin/poll/${currentPollId}/results/current`);
@@ -498,7 +551,7 @@ function displayLiveResults(resultsData) {
 
         card.innerHTML = `
             <div class="winner-title">${winner}</div>
-            <img src="/images/${imageResult.filename}" alt="${imageName}">
+            <img src="${imageUrl(imageResult)}" srcset="${imageSrcset(imageResult)}" sizes="30vw" alt="${imageName}">
             <div class="image-name-label">${imageName}</div>
             <div class="bars-container">
                 <div class="vote-column">
@@ -709,7 +762,7 @@ function createResultCell(imageData, category) {
     const voteCount = imageData[category];
 
     cell.innerHTML = `
-        <img src="/images/${imageData.filename}" alt="${imageName}">
+        <img src="${imageUrl(imageData, 'thumb')}" alt="${imageName}">
         <div class="image-name">${imageName}</div>
         <div class="vote-count">${voteCount} votes</div>
     `;
@@ -727,26 +780,26 @@ function createEmptyCell() {
 
 // Setup socket listeners
 function setupSocketListeners() {
+    // Full poll state, pushed on join and after every admin change
+    socket.on('dashboard_state', (state) => {
+        applyPollState(state.poll);
+    });
+
     socket.on('poll_started', (data) => {
         showNotificationCenter('Poll has started!', 'info');
-        checkCurrentPoll();
     });
 
     socket.on('group_changed', (data) => {
         showNotificationCenter('Moved to next group', 'info');
-        checkCurrentPoll();
     });
 
     socket.on('poll_ended', (data) => {
         showNotificationCenter('Poll has ended', 'info');
-        checkCurrentPoll();
-    });
-
-    socket.on('results_updated', (data) => {
-        // Refresh current group display if on poll control tab
-        const pollTab = document.getElementById('poll-tab');
-        if (pollTab.classList.contains('active')) {
-            loadCurrentGroup();
+        // Ended polls are not part of the pushed state, so update the one on screen here
+        if (currentPoll && (!data.poll_id || currentPoll.id === data.poll_id)) {
+            currentPoll.status = 'ended';
+            updatePollStatus();
+            updateButtonStates();
         }
     });
 }
@@ -49,7 +49,7 @@ function createImageCard(image) {
     const imageName = image.filename.replace(/\.[^/.]+$/, ''); // Remove extension
 
     card.innerHTML = `
-        <img src="/images/${image.filename}" alt="${image.filename}">
+        <img src="${imageUrl(image, 'thumb')}" alt="${image.filename}">
         <div class="image-info">
             <div class="status-badge ${image.is_active ? 'active' : 'inactive'}">
                 ${image.is_active ? 'Active' : 'Inactive'}
@@ -221,23 +221,58 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 });
 
-// Upload multiple files directly
+// Upload multiple files directly, in one request; the server reports each file as it is processed
 async function uploadMultipleFiles(files) {
-    showUploadStatus('Uploading images...', 'info');
+    showUploadStatus(`Uploading ${files.length} image(s)...`, 'info');
     document.getElementById('images-grid').classList.add('uploading');
 
     let successCount = 0;
     let failCount = 0;
     const errors = [];
 
-    for (const file of files) {
-        try {
-            await uploadSingleFile(file);
-            successCount++;
-        } catch (error) {
-            failCount++;
-            errors.push(`${file.name}: ${error.message}`);
+    try {
+        const formData = new FormData();
+        for (const file of files) {
+            formData.append('files', file);
+        }
+
+        const response = await fetch('/admin/images/upload/bulk', {
+            method: 'POST',
+            body: formData
+        });
+
+        if (!response.ok) {
+            const result = await response.json();
+            throw new Error(result.error || 'Upload failed');
         }
+
+        // Newline-delimited JSON: one line per file, then a summary
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffered += decoder.decode(value, { stream: true });
+
+            const lines = buffered.split('\n');
+            buffered = lines.pop();
+            for (const line of lines) {
+                if (!line) continue;
+                const result = JSON.parse(line);
+                if (result.done) continue;
+                if (result.success) {
+                    successCount++;
+                } else {
+                    failCount++;
+                    errors.push(`${result.filename}: ${result.error}`);
+                }
+                showUploadStatus(`Processed ${result.index} of ${result.total}...`, 'info');
+            }
+        }
+    } catch (error) {
+        failCount = files.length - successCount;
+        errors.push(error.message);
     }
 
     // Show results
@@ -288,14 +323,12 @@ async function uploadFileWithName(file, customName) {
     }
 }
 
-// Upload single file
+// Upload single file, streamed as the raw request body
 async function uploadSingleFile(file) {
-    const formData = new FormData();
-    formData.append('file', file);
-
-    const response = await fetch('/admin/images/upload', {
+    const response = await fetch(`/admin/images/upload/stream?filename=${encodeURIComponent(file.name)}`, {
         method: 'POST',
-        body: formData
+        headers: { 'Content-Type': file.type || 'application/octet-stream' },
+        body: file
     });
 
     if (!response.ok) {
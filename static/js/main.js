@@ -4,20 +4,168 @@
 
 // Initialize Socket.IO connection
 let socket;
+let socketRoleJoined = false;
 
-function initializeSocket() {
+// role is 'voter' (phones) or 'dashboard' (admin pages)
+function initializeSocket(role = 'voter') {
     socket = io();
 
     socket.on('connect', () => {
-        socket.emit('join_poll');
+        socket.emit('join_role', { role });
+    });
+
+    socket.on('joined_role', () => {
+        socketRoleJoined = true;
+    });
+
+    socket.on('role_error', (data) => {
+        console.error('Could not join socket room:', data.error);
     });
 
     socket.on('disconnect', () => {
+        socketRoleJoined = false;
     });
 
     return socket;
 }
 
+// True while the server is pushing updates; pages fall back to HTTP polling otherwise
+function liveUpdatesActive() {
+    return Boolean(socket && socket.connected && socketRoleJoined);
+}
+
+// Live result streams: a versioned snapshot on subscribe, then counter deltas.
+// Each stream's state is {version, counts: {imageId: {counter: n}}, total, ...snapshot fields}
+const resultStreams = {};
+let resultStreamListeners = false;
+
+function setupResultStreamListeners() {
+    if (resultStreamListeners) return;
+    resultStreamListeners = true;
+
+    socket.on('results_snapshot', (snapshot) => {
+        const stream = resultStreams[snapshot.stream];
+        if (!stream) return;
+        stream.state = snapshot;
+        stream.onUpdate(stream.state);
+    });
+
+    socket.on('results_delta', (delta) => {
+        const stream = resultStreams[delta.stream];
+        if (!stream || !stream.state) return;
+
+        // Already applied (e.g. a delta that raced the snapshot)
+        if (delta.version <= stream.state.version) return;
+
+        // Missed a message: ask for a fresh snapshot instead of applying out of order
+        if (delta.version !== stream.state.version + 1) {
+            stream.state = null;
+            socket.emit('results_subscribe', { stream: delta.stream });
+            return;
+        }
+
+        const state = stream.state;
+        Object.entries(delta.counts).forEach(([imageId, changes]) => {
+            const counts = state.counts[imageId] || (state.counts[imageId] = {});
+            Object.entries(changes).forEach(([counter, change]) => {
+                counts[counter] = (counts[counter] || 0) + change;
+            });
+        });
+        state.total += delta.total;
+        state.version = delta.version;
+        stream.onUpdate(state);
+    });
+
+    // Rooms are lost on reconnect, so subscribe again and resync
+    socket.on('connect', () => {
+        Object.keys(resultStreams).forEach(name => {
+            resultStreams[name].state = null;
+            socket.emit('results_subscribe', { stream: name });
+        });
+    });
+}
+
+function subscribeResults(streamName, onUpdate) {
+    setupResultStreamListeners();
+    resultStreams[streamName] = { state: null, onUpdate };
+    socket.emit('results_subscribe', { stream: streamName });
+}
+
+function unsubscribeResults(streamName) {
+    if (!resultStreams[streamName]) return;
+    delete resultStreams[streamName];
+    socket.emit('results_unsubscribe', { stream: streamName });
+}
+
+// Resized image variants (see image_variants.py); widths are the longest side in pixels
+const IMAGE_VARIANT_WIDTHS = { thumb: 240, mobile: 720, display: 1600 };
+
+// `image` is an image object from the API ({filename, version}). Round images carry their
+// content hash as `version`, so the browser can cache them for good; others are revalidated.
+function imageUrl(image, variant = 'mobile') {
+    const url = `/images/${variant}/${encodeURIComponent(image.filename)}`;
+    return image.version ? `${url}?v=${image.version}` : url;
+}
+
+function imageSrcset(image) {
+    return Object.entries(IMAGE_VARIANT_WIDTHS)
+        .map(([variant, width]) => `${imageUrl(image, variant)} ${width}w`)
+        .join(', ');
+}
+
+// Point an <img> at an image's variants; `sizes` is its rendered width, e.g. '90vw'
+function setImageSource(img, image, sizes) {
+    // Set sizes and srcset before src so the browser only downloads one candidate
+    img.sizes = sizes;
+    img.srcset = imageSrcset(image);
+    img.src = imageUrl(image);
+}
+
+// Rendered width of round images on the voting pages, shared with preloading
+const IMAGE_SIZES = {
+    smashpass: '(max-width: 768px) 90vw, 600px',
+    mfk: '(max-width: 768px) 240px, 280px'
+};
+
+// Preload the next rounds' images one at a time while the page is idle
+let prefetchRound = null;
+let prefetchQueue = [];
+let prefetchLoading = false;
+const prefetched = new Set();
+
+function prefetchImages(manifest) {
+    if (!manifest || manifest.round === prefetchRound) return;
+    prefetchRound = manifest.round;
+
+    prefetchQueue = manifest.images.filter(image => !prefetched.has(`${image.kind}:${image.filename}`));
+    prefetchNext();
+}
+
+function prefetchNext() {
+    if (prefetchLoading) return;
+    const image = prefetchQueue.shift();
+    if (!image) return;
+
+    prefetchLoading = true;
+    const whenIdle = window.requestIdleCallback || ((callback) => setTimeout(callback, 200));
+    whenIdle(() => {
+        const img = new Image();
+        img.onload = img.onerror = () => {
+            prefetchLoading = false;
+            prefetchNext();
+        };
+        prefetched.add(`${image.kind}:${image.filename}`);
+        // Same srcset and sizes as the voting page, so the browser picks the same variant
+        setImageSource(img, image, IMAGE_SIZES[image.kind]);
+    });
+}
+
+// Follow the prefetch manifest: fetch it now, then take pushed updates on every round change
+function startImagePrefetch() {
+    socket.on('prefetch_manifest', prefetchImages);
+    apiCall('/vote/prefetch').then(prefetchImages).catch(() => {});
+}
+
 // Utility function for API calls
 async function apiCall(url, method = 'GET', data = null) {
     const options = {
@@ -46,6 +194,30 @@ async function apiCall(url, method = 'GET', data = null) {
     }
 }
 
+// How long to wait for a socket vote's ack before retrying over HTTP
+const SOCKET_VOTE_TIMEOUT_MS = 5000;
+
+// Emit with an ack; resolves to null if no ack arrives in time
+function emitWithAck(event, data, timeoutMs) {
+    return new Promise((resolve) => {
+        socket.timeout(timeoutMs).emit(event, data, (err, result) => resolve(err ? null : result));
+    });
+}
+
+// Send a vote over the open socket, or POST it to `url` when the socket is down.
+// Votes replace the user's earlier vote, so an HTTP retry after a lost ack can't double count.
+async function sendVote(event, url, data) {
+    if (liveUpdatesActive()) {
+        const result = await emitWithAck(event, data, SOCKET_VOTE_TIMEOUT_MS);
+        // No ack in time, or a socket without a voter session: retry over HTTP
+        if (result && !result.fallback) {
+            if (result.error) throw new Error(result.error);
+            return result;
+        }
+    }
+    return apiCall(url, 'POST', data);
+}
+
 // Show notification/toast message
 function showNotification(message, type = 'info', position = 'top-right') {
     const notification = document.createElement('div');
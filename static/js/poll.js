@@ -24,6 +24,9 @@ document.addEventListener('DOMContentLoaded', () => {
     // Setup socket listeners
     setupSocketListeners();
 
+    // Preload upcoming groups' images in the background
+    startImagePrefetch();
+
     // Load current poll
     loadCurrentPoll();
 
@@ -83,7 +86,7 @@ function showPollInterface(groupData) {
         card.className = 'image-card';
         card.dataset.imageId = image.id;
         card.innerHTML = `
-            <img src="/images/${image.filename}" alt="${image.filename}">
+            <img src="${imageUrl(image)}" srcset="${imageSrcset(image)}" sizes="${IMAGE_SIZES.mfk}" alt="${image.filename}">
             <div class="category-badge" style="display: none;"></div>
         `;
 
@@ -342,7 +345,7 @@ async function submitPoll() {
     };
 
     try {
-        const result = await apiCall('/poll/submit', 'POST', submitData);
+        const result = await sendVote('submit_mfk', '/poll/submit', submitData);
         showNotification('Submitted successfully!', 'success');
 
         // Show waiting screen instead of results
@@ -358,11 +361,49 @@ async function loadAndShowResults() {
     try {
         const results = await apiCall(`/poll/results/${currentGroupId}`);
         displayResults(results);
+        followGroupResults(currentGroupId);
     } catch (error) {
         showNotification('Failed to load results', 'error');
     }
 }
 
+// Live result stream the results view is following
+let liveGroupStream = null;
+
+// Keep the results view live by applying the group's result deltas
+function followGroupResults(groupId) {
+    const streamName = `group:${groupId}`;
+    if (liveGroupStream === streamName) return;
+    stopFollowingResults();
+    liveGroupStream = streamName;
+
+    subscribeResults(streamName, (state) => {
+        const percent = (count) => state.total > 0 ? Math.round(count / state.total * 1000) / 10 : 0;
+        displayResults({
+            total_submissions: state.total,
+            results: state.images.map(img => {
+                const counts = state.counts[img.image_id];
+                return {
+                    filename: img.filename,
+                    marry: counts.marry,
+                    f: counts.f,
+                    kill: counts.kill,
+                    marry_pct: percent(counts.marry),
+                    f_pct: percent(counts.f),
+                    kill_pct: percent(counts.kill)
+                };
+            })
+        });
+    });
+}
+
+function stopFollowingResults() {
+    if (liveGroupStream) {
+        unsubscribeResults(liveGroupStream);
+        liveGroupStream = null;
+    }
+}
+
 // Display results
 function displayResults(data) {
     document.getElementById('poll-waiting').style.display = 'none';
@@ -384,7 +425,7 @@ function displayResults(data) {
         resultDiv.className = 'result-item';
         resultDiv.innerHTML = `
             <div class="result-item-header">
-                <img src="/images/${result.filename}" alt="${result.filename}">
+                <img src="${imageUrl(result, 'thumb')}" alt="${result.filename}">
                 <h4>${result.filename}</h4>
             </div>
             <div class="result-bars">
@@ -427,11 +468,13 @@ function setupSocketListeners() {
 
     socket.on('group_changed', (data) => {
         showNotification('Next group!', 'info');
+        stopFollowingResults();
         loadCurrentPoll();
     });
 
     socket.on('poll_ended', (data) => {
         showNotification('Poll ended. Thank you for participating!', 'info');
+        stopFollowingResults();
         document.getElementById('poll-waiting-next').style.display = 'none';
         showWaitingScreen('Poll has ended. Thank you for participating!');
     });
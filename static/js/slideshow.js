@@ -53,7 +53,7 @@ function showImage(index) {
 
     // Update display
     document.getElementById('image-name').textContent = image.name;
-    document.getElementById('current-image').src = `/images/${image.filename}`;
+    setImageSource(document.getElementById('current-image'), image, '100vw');
     document.getElementById('slide-counter').textContent = `${currentIndex + 1} / ${images.length}`;
 }
 
@@ -81,7 +81,7 @@ function showGridView() {
         const gridItem = document.createElement('div');
         gridItem.className = 'grid-item';
         gridItem.innerHTML = `
-            <img src="/images/${image.filename}" alt="${image.name}">
+            <img src="${imageUrl(image, 'thumb')}" alt="${image.name}">
             <div class="grid-item-name">${image.name}</div>
         `;
 
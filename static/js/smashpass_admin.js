@@ -14,7 +14,7 @@ function showNotificationCenter(message, type = 'info') {
 // Initialize admin panel
 document.addEventListener('DOMContentLoaded', () => {
     // Initialize socket
-    initializeSocket();
+    initializeSocket('dashboard');
 
     // Setup tabs
     setupTabs();
@@ -31,8 +31,9 @@ document.addEventListener('DOMContentLoaded', () => {
     // Check for existing session
     checkCurrentSession();
 
-    // Auto-refresh only active session live results
+    // Updates are pushed over the socket; poll only while it is disconnected
     setInterval(() => {
+        if (liveUpdatesActive()) return;
         if (currentSessionId && currentImage) {
             loadCurrentImage();
         }
@@ -146,9 +147,9 @@ async function loadQRCode() {
     try {
         const result = await apiCall('/smashpass/qr');
         // Load into both QR locations
-        document.getElementById('sp-qr-image-main').src = result.qr_code;
+        document.getElementById('sp-qr-image-main').src = result.image_url;
         document.getElementById('sp-qr-url-main').textContent = result.url;
-        document.getElementById('sp-qr-image').src = result.qr_code;
+        document.getElementById('sp-qr-image').src = result.image_url;
         document.getElementById('sp-qr-url').textContent = result.url;
     } catch (error) {
         console.error('Failed to load QR code:', error);
@@ -224,22 +225,31 @@ function setupButtonHandlers() {
 async function checkCurrentSession() {
     try {
         const result = await apiCall('/smashpass/session/current');
-        currentSession = result.session;
-        currentSessionId = result.session.id;
-        currentImage = result.current_image;
-
-        updateSessionStatus();
-        updateButtonStates();
-
-        if (currentImage) {
-            displayCurrentImage(currentImage);
-        }
+        applySessionState(result);
     } catch (error) {
         // No active session, which is fine
         console.log('No active session');
     }
 }
 
+// Apply session state from /smashpass/session/current or a pushed dashboard_state
+function applySessionState(result) {
+    if (!result) return;
+    currentSession = result.session;
+    currentSessionId = result.session.id;
+    currentImage = result.current_image;
+
+    updateSessionStatus();
+    updateButtonStates();
+
+    if (currentImage) {
+        displayCurrentImage(currentImage);
+    } else {
+        // No current image (session completed or not started)
+        document.getElementById('sp-main-content').style.display = 'none';
+    }
+}
+
 // Update session status display
 function updateSessionStatus() {
     const statusInfo = document.getElementById('status-info');
@@ -318,6 +328,26 @@ async function loadCurrentImage() {
     }
 }
 
+// Live result stream the dashboard is following
+let liveImageStream = null;
+
+// Follow the live result stream of the image on screen; deltas update its counts in place
+function followImageResults(sessionId, imageId) {
+    const streamName = `smashpass:${sessionId}:${imageId}`;
+    if (liveImageStream === streamName) return;
+    if (liveImageStream) unsubscribeResults(liveImageStream);
+    liveImageStream = streamName;
+
+    subscribeResults(streamName, (state) => {
+        const counts = state.counts[imageId] || {};
+        if (currentImage && currentImage.id === imageId) {
+            currentImage.smash_count = counts.smash || 0;
+            currentImage.pass_count = counts.pass || 0;
+            displayCurrentImage(currentImage);
+        }
+    });
+}
+
 // Display current image and results
 function displayCurrentImage(imageData) {
     // Hide initial QR, show main content
@@ -326,7 +356,7 @@ function displayCurrentImage(imageData) {
     displaySection.style.display = 'grid';
 
     document.getElementById('current-name').textContent = imageData.name;
-    document.getElementById('current-sp-image').src = `/images/${imageData.filename}`;
+    setImageSource(document.getElementById('current-sp-image'), imageData, '50vw');
 
     // Update vote counts
     const totalVotes = imageData.smash_count + imageData.pass_count;
@@ -340,6 +370,10 @@ function displayCurrentImage(imageData) {
     // Update vertical bars (height instead of width)
     document.getElementById('smash-bar').style.height = smashPercent + '%';
     document.getElementById('pass-bar').style.height = passPercent + '%';
+
+    if (currentSessionId) {
+        followImageResults(currentSessionId, imageData.id);
+    }
 }
 
 // Load and display final results
@@ -397,7 +431,7 @@ function createResultCard(imageData, type) {
     const card = document.createElement('div');
     card.className = 'result-card';
     card.innerHTML = `
-        <img src="/images/${imageData.filename}" alt="${imageData.name}">
+        <img src="${imageUrl(imageData, 'thumb')}" alt="${imageData.name}">
         <div class="name">${imageData.name}</div>
         <div class="votes">
             🔥 ${imageData.smash_count} | 👎 ${imageData.pass_count}
@@ -408,29 +442,20 @@ function createResultCard(imageData, type) {
 
 // Setup socket listeners
 function setupSocketListeners() {
-    socket.emit('join_smashpass');
+    // Full session state, pushed on join and after every admin change
+    socket.on('dashboard_state', (state) => {
+        applySessionState(state.smashpass);
+    });
 
     socket.on('smashpass_started', (data) => {
         showNotificationCenter('Session has started!', 'info');
-        checkCurrentSession();
     });
 
     socket.on('smashpass_next_image', (data) => {
         showNotificationCenter('Moved to next image', 'info');
-        loadCurrentImage();
     });
 
     socket.on('smashpass_completed', (data) => {
         showNotificationCenter('Session completed!', 'info');
-        checkCurrentSession();
-    });
-
-    socket.on('smashpass_vote_update', (data) => {
-        // Update current image display if it matches
-        if (currentImage && data.image_id === currentImage.id) {
-            currentImage.smash_count = data.smash_count;
-            currentImage.pass_count = data.pass_count;
-            displayCurrentImage(currentImage);
-        }
     });
 }
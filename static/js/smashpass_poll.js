@@ -53,7 +53,7 @@ function showVotingScreen(imageData, voted = false, userVote = null) {
 
     // Update image display
     document.getElementById('sp-image-name').textContent = imageData.name;
-    document.getElementById('sp-voting-image').src = `/images/${imageData.filename}`;
+    setImageSource(document.getElementById('sp-voting-image'), imageData, IMAGE_SIZES.smashpass);
 
     // Reset selection
     selectedVote = null;
@@ -140,7 +140,7 @@ async function submitVote(vote) {
     };
 
     try {
-        const result = await apiCall('/smashpass/vote', 'POST', voteData);
+        const result = await sendVote('cast_smashpass_vote', '/smashpass/vote', voteData);
         showNotification(`Voted ${vote.toUpperCase()}!`, 'success');
 
         // Update UI
@@ -162,14 +162,11 @@ function setupSocketListeners() {
         initializeSocket();
     }
 
-    // Join smashpass room
-    socket.on('connect', () => {
-        console.log('Socket connected - joining smashpass room');
-        socket.emit('join_smashpass');
-    });
+    // Preload upcoming images in the background
+    startImagePrefetch();
 
-    socket.on('joined_smashpass', (data) => {
-        console.log('Successfully joined smashpass room', data);
+    socket.on('joined_role', (data) => {
+        console.log('Successfully joined voters room', data);
     });
 
     socket.on('smashpass_started', (data) => {
@@ -195,10 +192,4 @@ function setupSocketListeners() {
         showNotification('Session completed! Thank you for participating!', 'info');
         showCompletedScreen();
     });
-
-    socket.on('smashpass_vote_update', (data) => {
-        console.log('Vote update received', data);
-        // Could show live vote counts here if desired
-        // For now, just keep the interface clean
-    });
 }
@@ -64,7 +64,7 @@ function showSPInterface(data) {
     document.getElementById('mfk-interface').style.display = 'none';
 
     document.getElementById('sp-image-name').textContent = data.image.name;
-    document.getElementById('sp-voting-image').src = `/images/${data.image.filename}`;
+    setImageSource(document.getElementById('sp-voting-image'), data.image, IMAGE_SIZES.smashpass);
 
     const smashBtn = document.getElementById('smash-btn');
     const passBtn = document.getElementById('pass-btn');
@@ -124,7 +124,7 @@ function setupSPControls() {
         };
 
         try {
-            await apiCall('/smashpass/vote', 'POST', voteData);
+            await sendVote('cast_smashpass_vote', '/smashpass/vote', voteData);
             showNotification(`Voted ${spSelectedVote.toUpperCase()}!`, 'success');
 
             spHasVoted = true;
@@ -169,7 +169,7 @@ function showMFKInterface(data) {
         card.className = 'image-card';
         card.dataset.imageId = image.id;
         card.innerHTML = `
-            <img src="/images/${image.filename}" alt="${image.filename}">
+            <img src="${imageUrl(image)}" srcset="${imageSrcset(image)}" sizes="${IMAGE_SIZES.mfk}" alt="${image.filename}">
             <div class="category-badge" style="display: none;"></div>
         `;
 
@@ -228,7 +228,7 @@ function setupMFKControls() {
         };
 
         try {
-            await apiCall('/poll/submit', 'POST', submitData);
+            await sendVote('submit_mfk', '/poll/submit', submitData);
             showNotification('Submitted successfully!', 'success');
 
             document.getElementById('mfk-voting').style.display = 'none';
@@ -327,10 +327,8 @@ function setupSocketListeners() {
         initializeSocket();
     }
 
-    socket.on('connect', () => {
-        socket.emit('join_smashpass');
-        socket.emit('join_poll');
-    });
+    // Preload upcoming rounds' images in the background
+    startImagePrefetch();
 
     // Universal vote changed event
     socket.on('vote_changed', (data) => {
@@ -0,0 +1,240 @@
+"""
+In-memory live vote tallies for the FMK Quiz application.
+
+Counters are rebuilt from the database the first time a session is touched
+and then kept up to date as votes are written, so reading the current totals
+never has to scan the votes table. Each user's latest ballot is remembered
+alongside the counters, so a changed vote can be applied as a delta without
+reading the old row back.
+"""
+import threading
+from sqlalchemy.orm import joinedload
+from database import db, PollGroup, Submission, SmashPassSession, SmashPassVote
+
+
+class SmashPassTally:
+    """Running smash/pass counters per (session_id, image_id)."""
+
+    def __init__(self):
+        # session_id -> {image_id: {'smash': n, 'pass': n, 'ballots': {user_id: vote}}}
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _load(self, session_id):
+        """Rebuild the counters for one session from the votes table."""
+        rows = db.session.query(
+            SmashPassVote.image_id,
+            SmashPassVote.user_id,
+            SmashPassVote.vote
+        ).filter_by(session_id=session_id).all()
+
+        images = {}
+        for image_id, user_id, vote in rows:
+            counts = images.setdefault(image_id, {'smash': 0, 'pass': 0, 'ballots': {}})
+            counts[vote] += 1
+            counts['ballots'][user_id] = vote
+        return images
+
+    def ensure_loaded(self, session_id):
+        """Make sure counters for a session are in memory."""
+        if session_id in self._sessions:
+            return
+        images = self._load(session_id)
+        with self._lock:
+            self._sessions.setdefault(session_id, images)
+
+    def warm(self):
+        """Rebuild counters for every active session (used on startup)."""
+        active_sessions = SmashPassSession.query.filter_by(status='active').all()
+        for session_obj in active_sessions:
+            self.ensure_loaded(session_obj.id)
+
+    def start_session(self, session_id):
+        """Register a brand new session with no votes."""
+        with self._lock:
+            self._sessions[session_id] = {}
+
+    def forget(self, session_id):
+        """Drop the counters for a session; they are rebuilt on next access."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def loaded(self):
+        """Ids of the sessions whose counters are in memory."""
+        return list(self._sessions)
+
+    def record(self, session_id, image_id, user_id, vote):
+        """
+        Apply a written vote to the counters.
+
+        If the user already voted on this image the earlier vote is taken back
+        first, so a smash -> pass flip moves one count instead of adding one.
+        Returns the updated (smash_count, pass_count).
+        """
+        if session_id not in self._sessions:
+            # Counters rebuilt after the commit already include this vote
+            self.ensure_loaded(session_id)
+            return self.get(session_id, image_id)
+
+        with self._lock:
+            counts = self._sessions[session_id].setdefault(
+                image_id, {'smash': 0, 'pass': 0, 'ballots': {}}
+            )
+            previous = counts['ballots'].get(user_id)
+            if previous:
+                counts[previous] -= 1
+            counts[vote] += 1
+            counts['ballots'][user_id] = vote
+            return counts['smash'], counts['pass']
+
+    def refresh(self, session_id, image_id):
+        """
+        Re-read one image's counters from the votes table, picking up votes
+        written by other workers. Returns the image's {user_id: vote} ballots.
+        """
+        rows = db.session.query(SmashPassVote.user_id, SmashPassVote.vote).filter_by(
+            session_id=session_id,
+            image_id=image_id
+        ).all()
+
+        counts = {'smash': 0, 'pass': 0, 'ballots': {}}
+        for user_id, vote in rows:
+            counts[vote] += 1
+            counts['ballots'][user_id] = vote
+
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions[session_id][image_id] = counts
+        return counts['ballots']
+
+    def get(self, session_id, image_id):
+        """Return (smash_count, pass_count) for an image in a session."""
+        self.ensure_loaded(session_id)
+        counts = self._sessions.get(session_id, {}).get(image_id)
+        if not counts:
+            return 0, 0
+        return counts['smash'], counts['pass']
+
+
+class GroupTally:
+    """Running marry/f/kill counters per image for each MFK poll group."""
+
+    def __init__(self):
+        # group_id -> {'images': [(image_id, filename), ...],
+        #              'counts': {image_id: {'marry': n, 'f': n, 'kill': n}},
+        #              'ballots': {user_id: (marry_id, f_id, kill_id)},
+        #              'total': n}
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def _load(self, group_id):
+        """Rebuild the aggregate for one group from the submissions table."""
+        group = PollGroup.query.options(
+            joinedload(PollGroup.image1),
+            joinedload(PollGroup.image2),
+            joinedload(PollGroup.image3)
+        ).filter_by(id=group_id).first()
+        if not group:
+            return None
+
+        images = [(image.id, image.filename) for image in (group.image1, group.image2, group.image3)]
+        counts = {image_id: {'marry': 0, 'f': 0, 'kill': 0} for image_id, _ in images}
+        ballots = {}
+
+        rows = db.session.query(
+            Submission.user_id,
+            Submission.marry_image_id,
+            Submission.f_image_id,
+            Submission.kill_image_id
+        ).filter_by(group_id=group_id).all()
+
+        for user_id, marry_id, f_id, kill_id in rows:
+            counts[marry_id]['marry'] += 1
+            counts[f_id]['f'] += 1
+            counts[kill_id]['kill'] += 1
+            ballots[user_id] = (marry_id, f_id, kill_id)
+
+        return {'images': images, 'counts': counts, 'ballots': ballots, 'total': len(ballots)}
+
+    def ensure_loaded(self, group_id):
+        """Make sure the aggregate for a group is in memory. Returns it, or None if the group does not exist."""
+        aggregate = self._groups.get(group_id)
+        if aggregate is not None:
+            return aggregate
+        aggregate = self._load(group_id)
+        if aggregate is None:
+            return None
+        with self._lock:
+            return self._groups.setdefault(group_id, aggregate)
+
+    def forget(self, group_id):
+        """Drop the aggregate for a group; it is rebuilt on next access."""
+        with self._lock:
+            self._groups.pop(group_id, None)
+
+    def loaded(self):
+        """Ids of the groups whose aggregates are in memory."""
+        return list(self._groups)
+
+    def read(self, group_id):
+        """Return the aggregate for a group without keeping a newly built one in memory, or None."""
+        return self._groups.get(group_id) or self._load(group_id)
+
+    def refresh(self, group_id):
+        """
+        Re-read a group's aggregate from the submissions table, picking up
+        submissions written by other workers. Returns the aggregate, or None.
+        """
+        aggregate = self._load(group_id)
+        with self._lock:
+            if aggregate is None:
+                self._groups.pop(group_id, None)
+            else:
+                self._groups[group_id] = aggregate
+        return aggregate
+
+    def rename_image(self, image_id, filename):
+        """Update the cached filename of an image in every loaded group."""
+        with self._lock:
+            for aggregate in self._groups.values():
+                aggregate['images'] = [
+                    (cached_id, filename if cached_id == image_id else cached_filename)
+                    for cached_id, cached_filename in aggregate['images']
+                ]
+
+    def drop_image(self, image_id):
+        """Forget every loaded group that contains a deleted image."""
+        with self._lock:
+            for group_id in [group_id for group_id, aggregate in self._groups.items()
+                             if image_id in aggregate['counts']]:
+                del self._groups[group_id]
+
+    def record(self, group_id, user_id, ballot):
+        """
+        Apply a written submission to the group aggregate.
+
+        `ballot` is a (marry_image_id, f_image_id, kill_image_id) triple; when
+        the user changes an earlier submission the old triple is subtracted
+        before the new one is added.
+        """
+        if group_id not in self._groups:
+            # Aggregate rebuilt after the commit already includes this submission
+            return self.ensure_loaded(group_id)
+
+        with self._lock:
+            aggregate = self._groups[group_id]
+            counts = aggregate['counts']
+            previous = aggregate['ballots'].get(user_id)
+            if previous:
+                for image_id, category in zip(previous, ('marry', 'f', 'kill')):
+                    counts[image_id][category] -= 1
+            else:
+                aggregate['total'] += 1
+            for image_id, category in zip(ballot, ('marry', 'f', 'kill')):
+                counts[image_id][category] += 1
+            aggregate['ballots'][user_id] = tuple(ballot)
+            return aggregate
+
+    def get(self, group_id):
+        """Return the aggregate for a group, or None if the group does not exist."""
+        return self.ensure_loaded(group_id)
@@ -0,0 +1,75 @@
+"""
+Shared fixtures: app.py loaded as separate worker modules over one temporary
+database, the way several gunicorn workers share data/fmk_quiz.db.
+"""
+import base64
+import importlib.util
+import pathlib
+import sys
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+ADMIN_HEADERS = {'Authorization': 'Basic ' + base64.b64encode(b'admin:admin123').decode()}
+
+
+@pytest.fixture
+def load_worker(tmp_path, monkeypatch):
+    """Return load(name, **env), which imports a fresh copy of app.py as module `name`."""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'fmk_quiz.db'}")
+    monkeypatch.delenv('SOCKETIO_MESSAGE_QUEUE', raising=False)
+    monkeypatch.delenv('ADMIN_PASSWORD', raising=False)
+    monkeypatch.syspath_prepend(str(ROOT))
+    loaded = []
+
+    def load(name, **env):
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        spec = importlib.util.spec_from_file_location(name, ROOT / 'app.py')
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        loaded.append(name)
+        spec.loader.exec_module(module)
+        for key in env:
+            monkeypatch.delenv(key)
+        return module
+
+    yield load
+    for name in loaded:
+        sys.modules.pop(name, None)
+
+
+def enable_multi_worker(worker):
+    """Switch a loaded worker to multi-worker mode without a message queue; tests call sync_shared_state()."""
+    from cluster import StateSync
+    worker.state_sync = StateSync(worker.app, worker.socketio, interval=0, sync=worker.sync_shared_state)
+    return worker
+
+
+def sync(worker):
+    with worker.app.app_context():
+        worker.sync_shared_state()
+
+
+def submit_mfk(client):
+    current = client.get('/poll/current').get_json()
+    marry, f, kill = [image['id'] for image in current['group']['images']]
+    response = client.post('/poll/submit', json={
+        'poll_id': current['poll_id'],
+        'group_id': current['group']['id'],
+        'marry_image_id': marry,
+        'f_image_id': f,
+        'kill_image_id': kill
+    })
+    assert response.status_code == 200, response.get_json()
+    return current['poll_id'], current['group']['id']
+
+
+def vote_smashpass(client, vote):
+    current = client.get('/smashpass/current').get_json()
+    response = client.post('/smashpass/vote', json={
+        'session_id': current['session_id'],
+        'image_id': current['image']['id'],
+        'vote': vote
+    })
+    assert response.status_code == 200, response.get_json()
+    return current['session_id'], current['image']['id']
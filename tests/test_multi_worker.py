@@ -0,0 +1,60 @@
+"""
+Two workers over one database: results of a round must include the votes
+taken by the other worker once the round has moved on.
+"""
+from conftest import ADMIN_HEADERS, enable_multi_worker, submit_mfk, sync, vote_smashpass
+
+
+def load_workers(load_worker):
+    return enable_multi_worker(load_worker('worker_a')), enable_multi_worker(load_worker('worker_b'))
+
+
+def test_previous_group_results_include_other_workers_votes(load_worker):
+    worker_a, worker_b = load_workers(load_worker)
+    admin = worker_a.app.test_client()
+    poll_id = admin.post('/admin/poll/create', headers=ADMIN_HEADERS).get_json()['poll']['id']
+    admin.post(f'/admin/poll/{poll_id}/start', headers=ADMIN_HEADERS)
+    sync(worker_b)
+
+    submit_mfk(worker_b.app.test_client())
+    sync(worker_b)
+    # Taken by worker A after worker B last synced
+    _, group_id = submit_mfk(worker_a.app.test_client())
+
+    admin.post(f'/admin/poll/{poll_id}/next-group', headers=ADMIN_HEADERS)
+    sync(worker_b)
+
+    for worker in (worker_a, worker_b):
+        results = worker.app.test_client().get(f'/poll/results/{group_id}').get_json()
+        assert results['total_submissions'] == 2
+
+
+def test_previous_image_counts_include_other_workers_votes(load_worker):
+    worker_a, worker_b = load_workers(load_worker)
+    admin = worker_a.app.test_client()
+    session_id = admin.post('/smashpass/session/create', headers=ADMIN_HEADERS).get_json()['session']['id']
+    sync(worker_b)
+
+    vote_smashpass(worker_b.app.test_client(), 'smash')
+    sync(worker_b)
+    _, image_id = vote_smashpass(worker_a.app.test_client(), 'pass')
+
+    admin.post(f'/smashpass/session/{session_id}/next', headers=ADMIN_HEADERS)
+    sync(worker_b)
+
+    with worker_b.app.app_context():
+        assert worker_b.sp_tally.get(session_id, image_id) == (1, 1)
+
+
+def test_completed_results_are_not_cached_per_worker(load_worker):
+    worker_a, worker_b = load_workers(load_worker)
+    admin = worker_a.app.test_client()
+    session_id = admin.post('/smashpass/session/create', headers=ADMIN_HEADERS).get_json()['session']['id']
+    sync(worker_b)
+    vote_smashpass(worker_b.app.test_client(), 'smash')
+    admin.post(f'/smashpass/session/{session_id}/end', headers=ADMIN_HEADERS)
+    sync(worker_b)
+
+    results = worker_b.app.test_client().get(f'/smashpass/session/{session_id}/results', headers=ADMIN_HEADERS)
+    assert [image['smash_count'] for image in results.get_json()['smashes']] == [1]
+    assert session_id not in worker_b.smashpass_results_cache
@@ -0,0 +1,60 @@
+"""
+Bulk uploads report every file and the summary even when one file fails
+unexpectedly, and the failed file's name can be uploaded again.
+"""
+import io
+import json
+import os
+import uuid
+import pytest
+from PIL import Image as PILImage
+from conftest import ADMIN_HEADERS
+
+
+def png():
+    data = io.BytesIO()
+    PILImage.new('RGB', (8, 8), 'red').save(data, format='PNG')
+    data.seek(0)
+    return data
+
+
+@pytest.fixture
+def worker(load_worker):
+    worker = load_worker('worker_uploads')
+    names = []
+    yield worker, names
+    # Uploads land in the repository's images/ folder
+    for name in names:
+        worker.image_uploads.unpublish(name)
+
+
+def bulk_upload(client, names):
+    response = client.post('/admin/images/upload/bulk', headers=ADMIN_HEADERS,
+                           data={'files': [(png(), name) for name in names]}, content_type='multipart/form-data')
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_bulk_upload_reports_unexpected_failures(worker, monkeypatch):
+    worker, names = worker
+    good, broken = f'good-{uuid.uuid4().hex}.png', f'broken-{uuid.uuid4().hex}.png'
+    names.extend([good, broken])
+
+    session = worker.db.session
+    commit = session.commit
+
+    def failing_commit():
+        if any(getattr(obj, 'filename', None) == broken for obj in session.new):
+            raise RuntimeError('disk I/O error')
+        commit()
+
+    with monkeypatch.context() as patch:
+        patch.setattr(session, 'commit', failing_commit)
+        lines = bulk_upload(worker.app.test_client(), [good, broken])
+
+    assert [line.get('success') for line in lines[:2]] == [True, False]
+    assert lines[1]['error'] == 'Upload failed'
+    assert lines[2] == {'done': True, 'uploaded': 1, 'failed': 1}
+    assert not os.path.exists(os.path.join(worker.image_uploads.images_dir, broken))
+
+    retried = bulk_upload(worker.app.test_client(), [broken])
+    assert retried[0]['success'] is True
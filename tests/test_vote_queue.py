@@ -0,0 +1,68 @@
+"""
+Write-behind mode: votes that cannot be written are taken back out of the
+live counters and presence they were counted in when accepted.
+"""
+import pytest
+from conftest import ADMIN_HEADERS, submit_mfk, vote_smashpass
+
+
+@pytest.fixture
+def worker(load_worker):
+    worker = load_worker('worker_write_behind', VOTE_WRITE_BEHIND='1')
+    assert worker.vote_queue is not None
+    return worker
+
+
+def fail_writes(monkeypatch, worker, fails):
+    """Make the queue's writes raise for every batch containing a row `fails` matches."""
+    write = worker.vote_queue._write
+
+    def failing_write(rows):
+        if any(fails(row) for row in rows):
+            raise RuntimeError('write failed')
+        write(rows)
+
+    monkeypatch.setattr(worker.vote_queue, '_write', failing_write)
+
+
+def user_id(client):
+    with client.session_transaction() as session:
+        return session['user_id']
+
+
+def test_dropped_smashpass_vote_is_uncounted(worker, monkeypatch):
+    worker.app.test_client().post('/smashpass/session/create', headers=ADMIN_HEADERS)
+    smasher, passer = worker.app.test_client(), worker.app.test_client()
+    vote_smashpass(smasher, 'smash')
+    session_id, image_id = vote_smashpass(passer, 'pass')
+
+    fail_writes(monkeypatch, worker, lambda row: row['vote'] == 'pass')
+    with worker.app.app_context():
+        assert worker.sp_tally.get(session_id, image_id) == (1, 1)
+        worker.vote_queue.drain()
+        assert worker.sp_tally.get(session_id, image_id) == (1, 0)
+    assert worker.vote_queue.metrics()['failed_rows'] == 1
+
+    presence = worker.active_round.smashpass_presence(session_id, image_id)
+    assert presence.choice(user_id(smasher)) == 'smash'
+    assert presence.choice(user_id(passer)) is None
+    assert passer.get('/smashpass/current').get_json()['has_voted'] is False
+
+
+def test_dropped_mfk_submission_is_uncounted(worker, monkeypatch):
+    admin = worker.app.test_client()
+    poll_id = admin.post('/admin/poll/create', headers=ADMIN_HEADERS).get_json()['poll']['id']
+    admin.post(f'/admin/poll/{poll_id}/start', headers=ADMIN_HEADERS)
+    kept, dropped = worker.app.test_client(), worker.app.test_client()
+    submit_mfk(kept)
+    _, group_id = submit_mfk(dropped)
+
+    dropped_user = user_id(dropped)
+    fail_writes(monkeypatch, worker, lambda row: row['user_id'] == dropped_user)
+    with worker.app.app_context():
+        worker.vote_queue.drain()
+    assert worker.app.test_client().get(f'/poll/results/{group_id}').get_json()['total_submissions'] == 1
+
+    presence = worker.active_round.mfk_presence(group_id)
+    assert presence.choice(user_id(kept)) == 'submitted'
+    assert presence.choice(dropped_user) is None
@@ -0,0 +1,130 @@
+"""
+Image uploads for the FMK Quiz application.
+
+Uploads are streamed to a temporary file next to the images folder in small
+chunks, so the size limit is enforced while reading rather than after the
+whole body is buffered. Pillow verification and variant building run on a
+native thread (eventlet's tpool) when serving under eventlet, keeping the hub
+free for live voting. A file only appears under its real name once it has
+been verified. The name is claimed with an exclusive create before the
+verified file is renamed over it, so two uploads of the same name cannot
+overwrite each other.
+"""
+import os
+import uuid
+from PIL import Image as PILImage
+
+try:
+    from eventlet import tpool
+except ImportError:  # optional: blocking work runs inline without eventlet
+    tpool = None
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadRejected(Exception):
+    """An upload that failed validation; the message is shown to the admin with HTTP `status`."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ImageUploads:
+    """Receives, verifies and publishes uploaded images into `variants.images_dir`."""
+
+    def __init__(self, variants, max_size, offload=False):
+        self.variants = variants
+        self.images_dir = variants.images_dir
+        self.max_size = max_size
+        # Only hand work to tpool when the server runs on the eventlet hub
+        self.offload = offload and tpool is not None
+
+    def _run(self, func, *args):
+        if self.offload:
+            return tpool.execute(func, *args)
+        return func(*args)
+
+    def receive(self, stream):
+        """
+        Copy an upload stream to a temporary file, chunk by chunk.
+
+        Returns the temporary path. Raises UploadRejected as soon as more than
+        `max_size` bytes have been read.
+        """
+        os.makedirs(self.images_dir, exist_ok=True)
+        # Hidden name without an image extension, so the startup scan skips it
+        temp_path = os.path.join(self.images_dir, f'.upload-{uuid.uuid4().hex}.part')
+        size = 0
+        try:
+            with open(temp_path, 'wb') as f:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_size:
+                        raise UploadRejected(f'File too large. Max size: {self.max_size / 1024 / 1024}MB', 413)
+                    f.write(chunk)
+        except BaseException:
+            self.discard(temp_path)
+            raise
+        if size == 0:
+            self.discard(temp_path)
+            raise UploadRejected('Empty file')
+        return temp_path
+
+    @staticmethod
+    def _verify(path):
+        with PILImage.open(path) as img:
+            img.verify()
+
+    def verify(self, temp_path):
+        """Check that a received file really is an image; discards it and raises UploadRejected if not."""
+        try:
+            self._run(self._verify, temp_path)
+        except Exception:
+            self.discard(temp_path)
+            raise UploadRejected('Invalid image file')
+
+    def publish(self, temp_path, filename):
+        """
+        Move a verified upload to its final name and build its variants.
+
+        Raises UploadRejected (and discards the upload) if a file with that
+        name already exists, including one published by a concurrent upload.
+        """
+        final_path = os.path.join(self.images_dir, filename)
+        try:
+            # Claim the name; only one upload can create it
+            os.close(os.open(final_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            self.discard(temp_path)
+            raise UploadRejected(f'Image with filename "{filename}" already exists')
+        try:
+            os.replace(temp_path, final_path)
+        except BaseException:
+            self.discard(final_path)
+            self.discard(temp_path)
+            raise
+        try:
+            self.build_variants(filename)
+        except Exception as e:
+            # The original is still servable; the startup scan retries the variants
+            print(f'Could not build variants for {filename}: {e}')
+
+    def unpublish(self, filename):
+        """Delete a published image and its variants, giving its name back."""
+        self.discard(os.path.join(self.images_dir, filename))
+        self.variants.remove(filename)
+
+    def build_variants(self, filename):
+        """Build an image's resized copies, off the hub when offloading."""
+        self._run(self.variants.build, filename)
+
+    @staticmethod
+    def discard(temp_path):
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
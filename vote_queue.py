@@ -0,0 +1,186 @@
+"""
+Write-behind vote queue for the FMK Quiz application.
+
+When enabled, validated votes and submissions are queued in memory and a
+background task writes them in batched transactions, so a burst of taps
+costs one commit per batch instead of one commit per vote.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from database import db, upsert_smashpass_votes, upsert_submissions
+
+
+class VoteWriteQueue:
+    """Bounded in-process queue of pending vote writes with group commit."""
+
+    def __init__(self, app, max_depth=10000, batch_size=200, flush_interval=0.005, on_dropped=None):
+        self.app = app
+        self.max_depth = max_depth
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Called in an app context with the rows that could not be written, which
+        # live counters have already counted
+        self.on_dropped = on_dropped
+
+        # identity key -> row; a newer vote for the same key replaces the queued one
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._started = False
+
+        self._metrics = {
+            'accepted': 0,
+            'coalesced': 0,
+            'rejected': 0,
+            'flushes': 0,
+            'rows_flushed': 0,
+            'failed_rows': 0,
+            'last_batch_size': 0,
+            'max_batch_size': 0,
+            'max_queue_depth': 0,
+            'last_flush_ms': 0.0,
+            'total_flush_ms': 0.0
+        }
+
+    @staticmethod
+    def smashpass_key(session_id, image_id, user_id):
+        return ('smashpass', session_id, image_id, user_id)
+
+    @staticmethod
+    def submission_key(group_id, user_id):
+        return ('submission', group_id, user_id)
+
+    def get(self, key):
+        """Return the queued row for an identity key, or None."""
+        return self._pending.get(key)
+
+    def put(self, key, row):
+        """
+        Queue a row for writing. Returns False if the queue is full.
+
+        `row` is a dict with a 'kind' of 'smashpass' or 'submission' and the
+        column values of the vote or submission.
+        """
+        with self._lock:
+            if key in self._pending:
+                self._pending[key] = row
+                self._metrics['coalesced'] += 1
+            else:
+                if len(self._pending) >= self.max_depth:
+                    self._metrics['rejected'] += 1
+                    return False
+                self._pending[key] = row
+            self._metrics['accepted'] += 1
+            self._metrics['max_queue_depth'] = max(self._metrics['max_queue_depth'], len(self._pending))
+        return True
+
+    def start(self, socketio):
+        """Start the background flush loop."""
+        if self._started:
+            return
+        self._started = True
+        socketio.start_background_task(self._run, socketio)
+
+    def _run(self, socketio):
+        while True:
+            flushed = self.flush()
+            # Keep draining without sleeping while full batches are waiting
+            if flushed < self.batch_size:
+                socketio.sleep(self.flush_interval)
+
+    def _take_batch(self):
+        with self._lock:
+            batch = []
+            while self._pending and len(batch) < self.batch_size:
+                batch.append(self._pending.popitem(last=False)[1])
+            return batch
+
+    def flush(self):
+        """Write one batch of queued rows in a single transaction. Returns the number of rows taken."""
+        with self._flush_lock:
+            batch = self._take_batch()
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            dropped = []
+            with self.app.app_context():
+                try:
+                    self._write(batch)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception('Batched vote write failed, retrying rows individually')
+                    dropped = self._write_individually(batch)
+            written = len(batch) - len(dropped)
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            metrics = self._metrics
+            metrics['flushes'] += 1
+            metrics['rows_flushed'] += written
+            metrics['failed_rows'] += len(batch) - written
+            metrics['last_batch_size'] = len(batch)
+            metrics['max_batch_size'] = max(metrics['max_batch_size'], len(batch))
+            metrics['last_flush_ms'] = round(elapsed_ms, 3)
+            metrics['total_flush_ms'] += elapsed_ms
+
+        # Outside the flush lock, so the callback can drain the queue before re-reading counters
+        if dropped and self.on_dropped:
+            with self.app.app_context():
+                try:
+                    self.on_dropped(dropped)
+                except Exception:
+                    self.app.logger.exception('Recounting dropped votes failed')
+        return len(batch)
+
+    def drain(self):
+        """Flush until the queue is empty (used before reading results from the database)."""
+        while self._pending:
+            self.flush()
+
+    def _write_individually(self, batch):
+        """Write rows one transaction each. Returns the rows that could not be written."""
+        dropped = []
+        for row in batch:
+            try:
+                self._write([row])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception('Dropping vote that could not be written: %r', row)
+                dropped.append(row)
+        return dropped
+
+    def _write(self, rows):
+        """Upsert queued rows in the current transaction, one statement per kind."""
+        smashpass_rows = [_columns(row) for row in rows if row['kind'] == 'smashpass']
+        submission_rows = [_columns(row) for row in rows if row['kind'] == 'submission']
+        if smashpass_rows:
+            upsert_smashpass_votes(smashpass_rows)
+        if submission_rows:
+            upsert_submissions(submission_rows)
+
+    def metrics(self):
+        """Return a snapshot of queue and flush metrics."""
+        metrics = dict(self._metrics)
+        flushes = metrics['flushes']
+        metrics['queue_depth'] = len(self._pending)
+        metrics['max_depth'] = self.max_depth
+        metrics['batch_size'] = self.batch_size
+        metrics['flush_interval_ms'] = self.flush_interval * 1000
+        metrics['avg_batch_size'] = round(metrics['rows_flushed'] / flushes, 2) if flushes else 0
+        total_flush_ms = metrics.pop('total_flush_ms')
+        metrics['avg_flush_ms'] = round(total_flush_ms / flushes, 3) if flushes else 0
+        return metrics
+
+
+def _columns(row):
+    """Strip the queue bookkeeping from a row, leaving only table columns."""
+    return {key: value for key, value in row.items() if key != 'kind'}
+
+
+def new_row(kind, **columns):
+    """Build a queued row stamped with the time the vote was accepted."""
+    return dict(columns, kind=kind, submitted_at=datetime.utcnow())